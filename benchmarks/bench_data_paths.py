@@ -0,0 +1,379 @@
+"""Benchmarks for the food catalog and meal log data paths.
+
+Runs the Sheets storage code against the in-memory fake (fake_sheets.py)
+seeded with a synthetic food catalog and Daily Logs sheet, and reports
+for each data path the median wall time per run and the number of
+Sheets API calls it issued. Times are also given relative to a fixed
+reference workload timed on the same machine, and it is these ratios
+and the call counts that are compared with the stored baseline in
+benchmarks/baseline.json, so a baseline saved on one machine can be
+checked on another.
+
+    python benchmarks/bench_data_paths.py --scale small
+    python benchmarks/bench_data_paths.py --foods 50000 --logs 200000
+    python benchmarks/bench_data_paths.py --scale medium --save-baseline
+    python benchmarks/bench_data_paths.py --check  # exit 1 on regressions
+
+--latency adds a simulated round trip to every API call, which makes
+the call counts show up in the wall times as they would against Google.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_workdir = tempfile.mkdtemp(prefix='nutritrackr-bench-')
+os.environ['SHEETS_BACKEND'] = 'fake'
+os.environ['STORAGE_BACKEND'] = 'sheets'
+os.environ['MEAL_LOG_WRITE_BEHIND'] = '0'
+# Measure the data paths themselves, not the client-side rate limiter
+os.environ['SHEETS_READ_QUOTA'] = os.environ['SHEETS_WRITE_QUOTA'] = '1000000'
+os.environ['FOOD_SNAPSHOT_PATH'] = os.path.join(_workdir,
+                                                'food_catalog.parquet')
+
+import streamlit.logger  # noqa: E402
+
+# Silence the "no runtime" warnings of running outside `streamlit run`
+streamlit.logger.set_log_level('error')
+
+import pandas as pd  # noqa: E402
+
+import fake_sheets  # noqa: E402
+import food_snapshot  # noqa: E402
+import sheets_db  # noqa: E402
+import storage  # noqa: E402
+import utils  # noqa: E402
+from log_frames import LOG_HEADERS  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Scale presets: (foods in the catalog, rows in the Daily Logs sheet)
+SCALES = {
+    'small': (1_000, 10_000),
+    'medium': (20_000, 100_000),
+    'large': (200_000, 1_000_000)
+}
+
+USERS = 100
+LOGS_PER_DAY = 10
+LOOKUPS = 1_000
+TARGET_MOBILE = '9000000000'
+
+# Relative slowdown reported as a regression, ignoring differences
+# below TIME_FLOOR seconds (timer noise on sub-millisecond paths)
+TIME_THRESHOLD = 0.25
+TIME_FLOOR = 0.001
+
+# Rows of the reference workload that benchmark times are divided by
+REFERENCE_ROWS = 50_000
+
+
+def synthetic_foods(count, rng):
+    rows = []
+    for i in range(count):
+        piece = i % 5 == 0
+        rows.append([
+            f'Food {i:06d}',
+            round(rng.uniform(20, 600), 1),
+            round(rng.uniform(0, 40), 1),
+            round(rng.uniform(0, 40), 1),
+            round(rng.uniform(0, 80), 1), 1 if piece else 100,
+            'p' if piece else 'gm',
+            rng.choice(['veg', 'non-veg', 'egg']),
+            round(rng.uniform(0, 10), 1), 50 if piece else '', 'bench'
+        ])
+    return rows
+
+
+def synthetic_logs(count, foods, rng):
+    """Return log rows for USERS users, in time order, and the days covered."""
+    days = max(1, count // (USERS * LOGS_PER_DAY))
+    start = datetime.now(sheets_db.ist_tz).replace(
+        hour=6, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    step = timedelta(days=days) / count
+    rows = []
+    for i in range(count):
+        food = foods[rng.randrange(len(foods))]
+        rows.append([
+            str(int(TARGET_MOBILE) + i % USERS), (start + step * i).isoformat(),
+            rng.choice(['Breakfast', 'Lunch', 'Dinner', 'Snacks']), food[5],
+            food[6], food[0], food[7], food[1], food[2], food[4], food[3]
+        ])
+    return rows, start.date(), days
+
+
+class Bench:
+    """Seeded fake spreadsheet plus the benchmarks that run against it."""
+
+    def __init__(self, foods, logs, latency, seed=0):
+        rng = random.Random(seed)
+        self.client = fake_sheets.get_fake_client()
+        spreadsheet = self.client.open(sheets_db.SPREADSHEET_NAME)
+
+        self.foods = synthetic_foods(foods, rng)
+        spreadsheet.sheet1.seed([fake_sheets.FOOD_HEADERS] + self.foods)
+
+        log_rows, self.first_day, self.days = synthetic_logs(
+            logs, self.foods, rng)
+        log_sheet = spreadsheet.add_worksheet(sheets_db.DAILY_LOGS_SHEET, 1,
+                                              len(LOG_HEADERS))
+        log_sheet.seed([LOG_HEADERS] + log_rows)
+
+        self.backend = storage.get_backend()
+        self.lookups = [
+            self.foods[rng.randrange(len(self.foods))][0].lower()
+            for _ in range(LOOKUPS // 2)
+        ] + [f'missing food {i}' for i in range(LOOKUPS // 2)]
+        self.added = 0
+        self.deleted = 0
+
+        # Resolve the worksheet handles (and store the catalog version)
+        # up front so no run pays for them
+        sheets_db.get_sheet()
+        sheets_db.get_daily_log_sheet()
+        sheets_db.get_food_catalog_version()
+        self.check_saved_log()
+        self.client.latency = latency
+        self.client.reset_stats()
+
+    def check_saved_log(self):
+        """Fail unless a just-saved meal comes back from the log reads.
+
+        Reads once before saving, so the save must be picked up by the
+        log index's incremental read rather than its initial full read.
+        """
+        mobile = str(int(TARGET_MOBILE) + USERS)  # Not a seeded user
+        today = datetime.now(sheets_db.ist_tz).strftime('%d-%m-%Y')
+        self.backend.get_daily_logs(mobile, today)
+        self.backend.get_daily_summaries(mobile)
+        self.backend.save_meal_log({
+            'mobile': mobile,
+            'meal_type': 'Lunch',
+            'weight': 100,
+            'basis': 'gm',
+            'food_name': self.foods[0][0],
+            'category': 'veg',
+            'calories': 123,
+            'protein': 4,
+            'carbs': 5,
+            'fat': 6
+        })
+        logs = self.backend.get_daily_logs(mobile, today)
+        summaries = self.backend.get_daily_summaries(mobile)
+        if [log['Food Name'] for log in logs] != [self.foods[0][0]]:
+            raise RuntimeError(f'Saved meal not read back: {logs}')
+        if [(s['date'], s['total_calories']) for s in summaries] != [
+                (today, 123)]:
+            raise RuntimeError(f'Saved meal not in summaries: {summaries}')
+
+    def day(self, offset):
+        return self.first_day + timedelta(days=offset % self.days)
+
+    # Setup hooks (not timed)
+
+    def new_catalog(self):
+        utils._catalog = utils.FoodCatalog(refresh_interval=3600,
+                                           max_age=3600)
+
+    def new_catalog_without_snapshot(self):
+        self.new_catalog()
+        if os.path.exists(food_snapshot.SNAPSHOT_PATH):
+            os.remove(food_snapshot.SNAPSHOT_PATH)
+
+    def reset_log_index(self):
+        sheets_db._log_index.reset()
+
+    # Benchmarks
+
+    def load_food_database(self):
+        utils.load_food_database()
+
+    def food_exists_in_database(self):
+        for name in self.lookups:
+            utils.food_exists_in_database(name)
+
+    def get_daily_logs(self):
+        logs = self.backend.get_daily_logs(TARGET_MOBILE,
+                                           self.day(-1).strftime('%d-%m-%Y'))
+        if not logs:
+            raise RuntimeError('No logs read for the seeded user')
+
+    def get_daily_summaries(self):
+        summaries = self.backend.get_daily_summaries(TARGET_MOBILE)
+        if not summaries or not all(s['total_calories'] > 0
+                                    for s in summaries):
+            raise RuntimeError(
+                f'Missing totals for the seeded user: {summaries}')
+
+    def add_food(self):
+        self.added += 1
+        self.backend.add_food({
+            'Food Name': f'Bench Food {self.added}',
+            'Calories': 100,
+            'Protein': 10,
+            'Fat': 5,
+            'Carbs': 5,
+            'Weight': 100,
+            'Basis': 'gm',
+            'Category': 'veg'
+        })
+
+    def delete_logs_by_date_range(self):
+        day = self.day(self.deleted)
+        self.deleted += 1
+        self.backend.delete_logs_by_date_range(TARGET_MOBILE, day, day)
+
+    def cases(self):
+        """Return (name, setup, run) for every benchmark, in run order."""
+        return [
+            ('load_food_database[download]',
+             self.new_catalog_without_snapshot, self.load_food_database),
+            ('load_food_database[snapshot]', self.new_catalog,
+             self.load_food_database),
+            ('load_food_database[warm]', None, self.load_food_database),
+            (f'food_exists_in_database[x{LOOKUPS}]', None,
+             self.food_exists_in_database),
+            ('get_daily_logs[cold]', self.reset_log_index,
+             self.get_daily_logs),
+            ('get_daily_logs[warm]', None, self.get_daily_logs),
+            ('get_daily_summaries[cold]', self.reset_log_index,
+             self.get_daily_summaries),
+            ('get_daily_summaries[warm]', None, self.get_daily_summaries),
+            ('add_food', None, self.add_food),
+            ('delete_logs_by_date_range', None,
+             self.delete_logs_by_date_range),
+        ]
+
+    def measure(self, setup, run, repeat, reference):
+        times = []
+        calls = 0
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            before = sum(self.client.calls.values())
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+            calls += sum(self.client.calls.values()) - before
+        return {
+            'median_s': round(statistics.median(times), 6),
+            'min_s': round(min(times), 6),
+            'relative': round(statistics.median(times) / reference, 6),
+            'calls': calls / repeat
+        }
+
+
+def reference_time(repeat=5):
+    """Return the median time of a fixed pandas and pure-Python workload.
+
+    Benchmark times are divided by it, which factors the speed of the
+    machine out of the comparison with the baseline.
+    """
+    rng = random.Random(0)
+    records = [{
+        'name': f'Food {i % 997}',
+        'value': rng.random()
+    } for i in range(REFERENCE_ROWS)]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = pd.DataFrame.from_records(records)
+        df.groupby('name')['value'].sum()
+        sorted(records, key=lambda record: record['value'])
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def baseline_key(args):
+    key = f'{args.foods}x{args.logs}'
+    return key if not args.latency else f'{key}@{args.latency}s'
+
+
+def report(results, baseline, reference):
+    """Print results next to the baseline; return the regressed names.
+
+    Times are compared as ratios to the reference workload; a baseline
+    without them (or from before they were recorded) only checks calls.
+    """
+    regressions = []
+    print(f"{'benchmark':<36}{'median':>10}{'relative':>10}{'baseline':>10}"
+          f"{'change':>9}{'calls':>8}{'baseline':>10}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = (f"{name:<36}{result['median_s'] * 1000:>8.2f}ms"
+                f"{result['relative']:>10.4f}")
+        if base is None:
+            print(f"{line}{'-':>10}{'':>9}{result['calls']:>8.1f}{'-':>10}")
+            continue
+        slower = False
+        if 'relative' in base:
+            change = (result['relative'] - base['relative']) / max(
+                base['relative'], 1e-9)
+            slower = change > TIME_THRESHOLD and (
+                result['relative'] - base['relative']) * reference > TIME_FLOOR
+            line += f"{base['relative']:>10.4f}{change:>+8.0%} "
+        else:
+            line += f"{'-':>10}{'':>9}"
+        regressed = slower or result['calls'] > base['calls']
+        if regressed:
+            regressions.append(name)
+        print(f"{line}{result['calls']:>7.1f}{base['calls']:>10.1f}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--foods', type=int, help='override the catalog size')
+    parser.add_argument('--logs', type=int, help='override the log row count')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency',
+                        type=float,
+                        default=0.0,
+                        help='simulated seconds per API call')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check',
+                        action='store_true',
+                        help='exit with status 1 if anything regressed')
+    args = parser.parse_args()
+    foods, logs = SCALES[args.scale]
+    args.foods = args.foods or foods
+    args.logs = args.logs or logs
+
+    print(f'Seeding {args.foods} foods and {args.logs} log rows...')
+    bench = Bench(args.foods, args.logs, args.latency)
+    reference = reference_time()
+    print(f'Reference workload: {reference * 1000:.2f}ms')
+    results = {
+        name: bench.measure(setup, run, args.repeat, reference)
+        for name, setup, run in bench.cases()
+    }
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    key = baseline_key(args)
+    regressions = report(results, baselines.get(key, {}), reference)
+
+    if args.save_baseline:
+        baselines[key] = results
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Saved baseline {key} to {BASELINE_PATH}')
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
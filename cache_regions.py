@@ -0,0 +1,37 @@
+"""Named cache regions with versioned keys.
+
+Cached functions take the current version of their region as an extra
+argument, so bumping a region's version makes only that region's
+entries miss, instead of st.cache_data.clear() flushing every cache for
+every session. Per-user regions are versioned per mobile number.
+"""
+import threading
+
+FOOD_CATALOG = 'food_catalog'
+USER_LOGS = 'user_logs'
+USER_PROFILE = 'user_profile'
+USER_RECIPES = 'user_recipes'
+
+# Truthy result of a backend save that found nothing to write, so no
+# region needs to be invalidated
+UNCHANGED = 'unchanged'
+
+_lock = threading.Lock()
+_versions = {}
+
+
+def _region_key(region, key):
+    return region, None if key is None else str(key).strip()
+
+
+def region_version(region, key=None):
+    """Return the current version of a region (optionally per key)."""
+    with _lock:
+        return _versions.get(_region_key(region, key), 0)
+
+
+def invalidate_region(region, key=None):
+    """Bump a region's version so its cached entries are reloaded."""
+    with _lock:
+        region_key = _region_key(region, key)
+        _versions[region_key] = _versions.get(region_key, 0) + 1
@@ -0,0 +1,485 @@
+"""In-memory, gspread-compatible stand-in for Google Sheets.
+
+Selected with SHEETS_BACKEND=fake, it lets the app, load tests and
+benchmarks run without credentials or network access. It implements the
+client, spreadsheet and worksheet calls sheets_db makes, with the same
+return shapes and error types as gspread (APIError with the Sheets
+status code, WorksheetNotFound, SpreadsheetNotFound).
+
+Every request can be slowed down by a fixed latency plus random jitter,
+and read and write requests are counted against per-minute quotas like
+the real API, raising a 429 APIError once a quota is used up. Requests
+are also counted per operation in FakeClient.calls.
+"""
+import csv
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+import requests
+from gspread.exceptions import (APIError, SpreadsheetNotFound,
+                                WorksheetNotFound)
+from gspread.utils import a1_range_to_grid_range, numericise_all, rowcol_to_a1
+
+LATENCY = float(os.getenv('FAKE_SHEETS_LATENCY', '0'))
+LATENCY_JITTER = float(os.getenv('FAKE_SHEETS_LATENCY_JITTER', '0'))
+# Requests allowed per minute; 0 means unlimited
+READ_QUOTA = int(os.getenv('FAKE_SHEETS_READ_QUOTA', '0'))
+WRITE_QUOTA = int(os.getenv('FAKE_SHEETS_WRITE_QUOTA', '0'))
+QUOTA_WINDOW = 60.0
+
+# Optional CSV loaded into the first sheet of auto-created spreadsheets
+SEED_PATH = os.getenv('FAKE_SHEETS_SEED')
+
+# Header row of a new spreadsheet's first (food) sheet, as in utils.FOOD_COLUMNS
+FOOD_HEADERS = [
+    'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight', 'Basis',
+    'Category', 'Fibre', 'Avg Weight', 'Source'
+]
+
+
+def _api_error(code, message, status):
+    """Build the APIError gspread raises for an error response."""
+    response = requests.Response()
+    response.status_code = code
+    response._content = json.dumps({
+        'error': {
+            'code': code,
+            'message': message,
+            'status': status
+        }
+    }).encode()
+    return APIError(response)
+
+
+def _cell_text(value):
+    """Return the formatted text Sheets would store for value."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _trim_row(row):
+    end = len(row)
+    while end and row[end - 1] == '':
+        end -= 1
+    return row[:end]
+
+
+def _trim_rows(rows):
+    """Drop trailing empty cells and rows, as the values API does."""
+    rows = [_trim_row(row) for row in rows]
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class FakeClient:
+    """In-memory replacement for gspread.Client.
+
+    Spreadsheets are kept by title. With auto_create, opening a missing
+    spreadsheet creates it (seeded from seed_path if given) instead of
+    raising SpreadsheetNotFound.
+    """
+
+    def __init__(self,
+                 latency=LATENCY,
+                 jitter=LATENCY_JITTER,
+                 read_quota=READ_QUOTA,
+                 write_quota=WRITE_QUOTA,
+                 auto_create=False,
+                 seed_path=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.read_quota = read_quota
+        self.write_quota = write_quota
+        self.auto_create = auto_create
+        self.seed_path = seed_path
+        self.calls = Counter()
+        self._lock = threading.RLock()
+        self._requests = {'read': deque(), 'write': deque()}
+        self._spreadsheets = {}
+
+    def request(self, kind, operation):
+        """Account for one API request: latency, quota and call counts."""
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        quota = self.read_quota if kind == 'read' else self.write_quota
+        with self._lock:
+            self.calls[operation] += 1
+            if not quota:
+                return
+            now = time.monotonic()
+            window = self._requests[kind]
+            while window and now - window[0] >= QUOTA_WINDOW:
+                window.popleft()
+            if len(window) >= quota:
+                self.calls['quota_exceeded'] += 1
+                metric = 'Read' if kind == 'read' else 'Write'
+                raise _api_error(
+                    429, f"Quota exceeded for quota metric '{metric} "
+                    f"requests' and limit '{metric} requests per minute'",
+                    'RESOURCE_EXHAUSTED')
+            window.append(now)
+
+    def reset_stats(self):
+        """Clear the call counters and the quota windows."""
+        with self._lock:
+            self.calls.clear()
+            for window in self._requests.values():
+                window.clear()
+
+    def create(self, title):
+        """Create an empty spreadsheet with one worksheet, 'Sheet1'."""
+        self.request('write', 'create')
+        return self._create(title)
+
+    def _create(self, title):
+        with self._lock:
+            spreadsheet = FakeSpreadsheet(self, title)
+            spreadsheet._add('Sheet1', 1000, 26)
+            self._spreadsheets[title] = spreadsheet
+            return spreadsheet
+
+    def open(self, title):
+        self.request('read', 'open')
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(title)
+            if spreadsheet is None:
+                if not self.auto_create:
+                    raise SpreadsheetNotFound(title)
+                spreadsheet = self._create(title)
+                spreadsheet._seed(self.seed_path)
+            return spreadsheet
+
+    def open_by_key(self, key):
+        self.request('read', 'open_by_key')
+        with self._lock:
+            for spreadsheet in self._spreadsheets.values():
+                if spreadsheet.id == key:
+                    return spreadsheet
+        raise SpreadsheetNotFound(key)
+
+    def list_spreadsheet_files(self, title=None, folder_id=None):
+        self.request('read', 'list_spreadsheet_files')
+        with self._lock:
+            return [{
+                'id': spreadsheet.id,
+                'name': spreadsheet.title,
+                'modifiedTime': spreadsheet.modified_time,
+                'createdTime': spreadsheet.created_time
+            } for spreadsheet in self._spreadsheets.values()
+                    if title is None or spreadsheet.title == title]
+
+
+class FakeSpreadsheet:
+    """In-memory replacement for gspread.Spreadsheet."""
+
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.id = uuid.uuid4().hex
+        self._worksheets = []
+        self._next_sheet_id = 0
+        self.created_time = self.modified_time = self._now()
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    def _touch(self):
+        self.modified_time = self._now()
+
+    def _add(self, title, rows, cols):
+        if any(ws.title == title for ws in self._worksheets):
+            raise _api_error(
+                400, f'Invalid requests[0].addSheet: A sheet with the name '
+                f'"{title}" already exists. Please enter another name.',
+                'INVALID_ARGUMENT')
+        worksheet = FakeWorksheet(self, self._next_sheet_id, title, rows,
+                                  cols)
+        self._next_sheet_id += 1
+        self._worksheets.append(worksheet)
+        self._touch()
+        return worksheet
+
+    def _seed(self, seed_path):
+        """Fill the first sheet from a CSV file, or with the food headers."""
+        rows = [FOOD_HEADERS]
+        if seed_path:
+            with open(seed_path, newline='') as f:
+                rows = [row for row in csv.reader(f)]
+        self.sheet1.seed(rows)
+
+    @property
+    def sheet1(self):
+        return self._worksheets[0]
+
+    def worksheets(self):
+        self.client.request('read', 'worksheets')
+        return list(self._worksheets)
+
+    def worksheet(self, title):
+        self.client.request('read', 'worksheet')
+        with self.client._lock:
+            for worksheet in self._worksheets:
+                if worksheet.title == title:
+                    return worksheet
+        raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        self.client.request('write', 'add_worksheet')
+        with self.client._lock:
+            return self._add(title, int(rows), int(cols))
+
+    def del_worksheet(self, worksheet):
+        self.client.request('write', 'del_worksheet')
+        with self.client._lock:
+            self._worksheets.remove(worksheet)
+            worksheet._deleted = True
+            self._touch()
+
+    def batch_update(self, body):
+        """Apply spreadsheets.batchUpdate requests (deleteDimension only)."""
+        self.client.request('write', 'spreadsheet.batch_update')
+        with self.client._lock:
+            for request in body.get('requests', []):
+                if 'deleteDimension' not in request:
+                    raise _api_error(
+                        400, 'Unsupported request in fake Sheets: '
+                        f'{", ".join(request)}', 'INVALID_ARGUMENT')
+                dim = request['deleteDimension']['range']
+                worksheet = self._by_id(dim['sheetId'])
+                if dim['dimension'] != 'ROWS':
+                    raise _api_error(400, 'Only ROWS can be deleted',
+                                     'INVALID_ARGUMENT')
+                worksheet._delete_rows(dim['startIndex'], dim['endIndex'])
+            return {'spreadsheetId': self.id, 'replies': []}
+
+    def _by_id(self, sheet_id):
+        for worksheet in self._worksheets:
+            if worksheet.id == sheet_id:
+                return worksheet
+        raise _api_error(400, f'No grid with id: {sheet_id}',
+                         'INVALID_ARGUMENT')
+
+    def get_lastUpdateTime(self):
+        self.client.request('read', 'get_lastUpdateTime')
+        return self.modified_time
+
+
+class FakeWorksheet:
+    """In-memory replacement for gspread.Worksheet.
+
+    Cells are stored as the formatted strings the values API returns, in
+    a grid of row_count x col_count cells that appends grow as needed.
+    """
+
+    def __init__(self, spreadsheet, sheet_id, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.client = spreadsheet.client
+        self.id = sheet_id
+        self.title = title
+        self.row_count = max(1, rows)
+        self.col_count = max(1, cols)
+        self._rows = []
+        self._deleted = False
+
+    def __repr__(self):
+        return f"<FakeWorksheet {self.title!r} id:{self.id}>"
+
+    def _request(self, kind, operation):
+        self.client.request(kind, operation)
+        if self._deleted:
+            raise _api_error(400, f"Unable to parse range: '{self.title}'",
+                             'INVALID_ARGUMENT')
+
+    def _grid(self, a1_range):
+        """Return zero-based (row_start, row_end, col_start, col_end)."""
+        grid = a1_range_to_grid_range(a1_range)
+        bounds = (grid.get('startRowIndex', 0),
+                  grid.get('endRowIndex', self.row_count),
+                  grid.get('startColumnIndex', 0),
+                  grid.get('endColumnIndex', self.col_count))
+        if bounds[1] > self.row_count or bounds[3] > self.col_count or \
+                bounds[0] >= self.row_count or bounds[2] >= self.col_count:
+            raise _api_error(
+                400, f"Range ('{self.title}'!{a1_range}) exceeds grid "
+                f"limits. Max rows: {self.row_count}, max columns: "
+                f"{self.col_count}", 'INVALID_ARGUMENT')
+        return bounds
+
+    def _read(self, row_start, row_end, col_start, col_end):
+        rows = [row[col_start:col_end] for row in self._rows[row_start:row_end]]
+        return _trim_rows(rows)
+
+    def _write(self, row, col, value):
+        while len(self._rows) <= row:
+            self._rows.append([])
+        cells = self._rows[row]
+        while len(cells) <= col:
+            cells.append('')
+        cells[col] = _cell_text(value)
+
+    def _data_rows(self):
+        """Return the number of rows up to the last non-empty one."""
+        return len(_trim_rows(self._rows))
+
+    def _delete_rows(self, start, end):
+        if end > self.row_count or start >= end:
+            raise _api_error(400, 'Invalid row range to delete',
+                             'INVALID_ARGUMENT')
+        del self._rows[start:end]
+        self.row_count -= end - start
+        self.spreadsheet._touch()
+
+    def seed(self, rows):
+        """Replace the sheet's contents without counting requests."""
+        with self.client._lock:
+            self._rows = []
+            for r, values in enumerate(rows):
+                for c, value in enumerate(values):
+                    self._write(r, c, value)
+            self.row_count = max(self.row_count, len(self._rows))
+            self.col_count = max([self.col_count] +
+                                 [len(row) for row in self._rows])
+            self.spreadsheet._touch()
+
+    # Reads
+
+    def get_all_values(self, **kwargs):
+        self._request('read', 'get_all_values')
+        with self.client._lock:
+            rows = _trim_rows(self._rows)
+            width = max((len(row) for row in rows), default=0)
+            return [row + [''] * (width - len(row)) for row in rows]
+
+    def get_all_records(self, head=1, default_blank='', empty2zero=False,
+                        **kwargs):
+        self._request('read', 'get_all_records')
+        with self.client._lock:
+            rows = _trim_rows(self._rows)
+        if len(rows) < head:
+            return []
+        headers = rows[head - 1]
+        records = []
+        for row in rows[head:]:
+            row = row + [''] * (len(headers) - len(row))
+            values = numericise_all(row[:len(headers)],
+                                    empty2zero=empty2zero,
+                                    default_blank=default_blank)
+            records.append(dict(zip(headers, values)))
+        return records
+
+    def row_values(self, row, **kwargs):
+        self._request('read', 'row_values')
+        with self.client._lock:
+            if row - 1 >= len(self._rows):
+                return []
+            return _trim_row(list(self._rows[row - 1]))
+
+    def col_values(self, col, **kwargs):
+        self._request('read', 'col_values')
+        with self.client._lock:
+            column = [row[col - 1] if col - 1 < len(row) else ''
+                      for row in self._rows]
+            return _trim_row(column)
+
+    def batch_get(self, ranges, **kwargs):
+        self._request('read', 'batch_get')
+        with self.client._lock:
+            return [self._read(*self._grid(a1)) for a1 in ranges]
+
+    # Writes
+
+    def update_cell(self, row, col, value):
+        self._request('write', 'update_cell')
+        with self.client._lock:
+            self._grid(rowcol_to_a1(row, col))
+            self._write(row - 1, col - 1, value)
+            self.spreadsheet._touch()
+            return {'updatedRange': f"'{self.title}'!{rowcol_to_a1(row, col)}",
+                    'updatedCells': 1}
+
+    def batch_update(self, data, value_input_option=None, **kwargs):
+        self._request('write', 'batch_update')
+        with self.client._lock:
+            grids = [self._grid(item['range']) for item in data]
+            updated = 0
+            for (row_start, row_end, col_start, col_end), item in zip(
+                    grids, data):
+                for r, values in enumerate(item['values'][:row_end -
+                                                          row_start]):
+                    for c, value in enumerate(values[:col_end - col_start]):
+                        self._write(row_start + r, col_start + c, value)
+                        updated += 1
+            self.spreadsheet._touch()
+            return {'spreadsheetId': self.spreadsheet.id,
+                    'totalUpdatedCells': updated}
+
+    def append_row(self, values, value_input_option='RAW', **kwargs):
+        return self._append([values], 'append_row')
+
+    def append_rows(self, values, value_input_option='RAW', **kwargs):
+        return self._append(values, 'append_rows')
+
+    def _append(self, rows, operation):
+        """Write rows after the last non-empty row, growing the grid."""
+        self._request('write', operation)
+        with self.client._lock:
+            start = self._data_rows()
+            del self._rows[start:]
+            width = 0
+            for r, values in enumerate(rows):
+                self._write(start + r, 0, None)
+                for c, value in enumerate(values):
+                    self._write(start + r, c, value)
+                width = max(width, len(values))
+            self.row_count = max(self.row_count, start + len(rows))
+            self.col_count = max(self.col_count, width)
+            self.spreadsheet._touch()
+
+            updated_range = '{0}:{1}'.format(
+                rowcol_to_a1(start + 1, 1),
+                rowcol_to_a1(start + len(rows), max(width, 1)))
+            return {
+                'spreadsheetId': self.spreadsheet.id,
+                'updates': {
+                    'spreadsheetId': self.spreadsheet.id,
+                    'updatedRange': f"'{self.title}'!{updated_range}",
+                    'updatedRows': len(rows),
+                    'updatedColumns': width,
+                    'updatedCells': sum(len(values) for values in rows)
+                }
+            }
+
+    def delete_rows(self, start_index, end_index=None):
+        self._request('write', 'delete_rows')
+        with self.client._lock:
+            end_index = start_index if end_index is None else end_index
+            self._delete_rows(start_index - 1, end_index)
+            return {'spreadsheetId': self.spreadsheet.id, 'replies': [{}]}
+
+
+_fake_client = None
+_fake_client_lock = threading.Lock()
+
+
+def get_fake_client():
+    """Return the process-wide fake client, configured from the environment."""
+    global _fake_client
+    with _fake_client_lock:
+        if _fake_client is None:
+            _fake_client = FakeClient(auto_create=True, seed_path=SEED_PATH)
+        return _fake_client
@@ -0,0 +1,53 @@
+"""Normalized food-name index for O(1) existence checks and lookups."""
+import threading
+
+
+def normalize_food_name(name):
+    """Return the form food names are compared in (trimmed, lower-case)."""
+    return str(name).strip().lower()
+
+
+class FoodNameIndex:
+    """Hash index from normalized food names to row positions.
+
+    The index is built once from a column of names and then kept in
+    step with inserts, so lookups never rescan the catalog.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None
+
+    @property
+    def loaded(self):
+        return self._rows is not None
+
+    def rebuild(self, names, start=0):
+        """Index names, numbering their rows from start."""
+        rows = {}
+        for row, name in enumerate(names, start):
+            rows.setdefault(normalize_food_name(name), row)
+        with self._lock:
+            self._rows = rows
+
+    def contains(self, name):
+        with self._lock:
+            return self._rows is not None and normalize_food_name(
+                name) in self._rows
+
+    def row(self, name):
+        """Return the row of name, or None if it isn't indexed."""
+        with self._lock:
+            if self._rows is None:
+                return None
+            return self._rows.get(normalize_food_name(name))
+
+    def add(self, name, row=None):
+        """Record an inserted name (its row may be unknown)."""
+        with self._lock:
+            if self._rows is not None:
+                self._rows.setdefault(normalize_food_name(name), row)
+
+    def reset(self):
+        with self._lock:
+            self._rows = None
@@ -0,0 +1,229 @@
+"""Typo-tolerant food name search over a word trigram inverted index."""
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+
+from food_index import normalize_food_name
+
+# Minimum trigram similarity for a name word to match a query word
+MIN_WORD_SIMILARITY = 0.3
+# Minimum score (mean over the query words) for a name to be returned
+MIN_SIMILARITY = 0.3
+# Similarity of a name word that starts with the query word
+PREFIX_SIMILARITY = 0.9
+
+_WORD = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Return the set of padded character trigrams of normalized text."""
+    padded = f"  {normalize_food_name(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def words(text):
+    """Return the words of normalized text."""
+    return _WORD.findall(normalize_food_name(text))
+
+
+class _Index:
+    """Postings of one catalog version.
+
+    Catalog words are indexed by trigram, and each word lists the names
+    containing it (and, separately, the names starting with it) in rank
+    order: fewer words first, then catalog order.
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self.normalized = []
+        self.name_words = []
+        self.words = []
+        self.word_ids = {}
+        self.word_grams = []
+        self.word_names = []
+        self.word_first = []
+        self.postings = {}
+        for name in names:
+            self._add(name)
+        for postings in self.word_names + self.word_first:
+            postings.sort(key=self.rank)
+
+    def rank(self, idx):
+        return len(self.name_words[idx]), idx
+
+    def _word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            grams = trigrams(word)
+            self.word_grams.append(len(grams))
+            self.word_names.append([])
+            self.word_first.append([])
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(word_id)
+        return word_id
+
+    def _add(self, name):
+        idx = len(self.names)
+        self.names.append(name)
+        self.normalized.append(normalize_food_name(name))
+        word_ids = [self._word_id(word) for word in words(name)]
+        self.name_words.append(word_ids)
+        for word_id in set(word_ids):
+            self.word_names[word_id].append(idx)
+        if word_ids:
+            self.word_first[word_ids[0]].append(idx)
+        return idx, word_ids
+
+    def add(self, name):
+        """Index one more name, keeping the postings in rank order."""
+        idx, word_ids = self._add(name)
+        for word_id in set(word_ids):
+            postings = self.word_names[word_id]
+            postings.pop()
+            bisect.insort(postings, idx, key=self.rank)
+        if word_ids:
+            postings = self.word_first[word_ids[0]]
+            postings.pop()
+            bisect.insort(postings, idx, key=self.rank)
+
+    def similar_words(self, query_word):
+        """Return {word id: similarity} of the words matching query_word."""
+        grams = trigrams(query_word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        matches = {}
+        for word_id, count in shared.items():
+            word = self.words[word_id]
+            if word == query_word:
+                similarity = 1.0
+            elif word.startswith(query_word):
+                similarity = PREFIX_SIMILARITY
+            else:
+                similarity = count / (len(grams) + self.word_grams[word_id] -
+                                      count)
+                if similarity < MIN_WORD_SIMILARITY:
+                    continue
+            matches[word_id] = similarity
+        return matches
+
+
+class FoodSearchIndex:
+    """Word trigram inverted index over food names, with fuzzy ranking.
+
+    Each query word is matched against the distinct words of the catalog
+    (exactly, as a prefix, or by trigram similarity, which tolerates
+    typos), and names are scored by how well their words cover the query
+    words. The index of a catalog version is built by set_names(), which
+    the catalog calls when it swaps the version in, so searches never
+    build it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = _Index()
+
+    def set_names(self, names):
+        """Index a new catalog version's names and swap them in."""
+        index = _Index(names)
+        with self._lock:
+            self._index = index
+
+    def add(self, name):
+        """Add a single name without rebuilding the index."""
+        with self._lock:
+            self._index.add(name)
+
+    def search(self, query, limit=10):
+        """Return up to limit names for query, best match first.
+
+        Names matching more of the query words rank first, then by the
+        sum of the best similarity of one of their words to each query
+        word. Ties go to names that start with the query, then to names
+        with fewer words.
+        """
+        query_text = normalize_food_name(query)
+        query_words = list(dict.fromkeys(words(query_text)))
+        if not query_words or limit <= 0:
+            return []
+
+        with self._lock:
+            index = self._index
+            matches = [index.similar_words(word) for word in query_words]
+            if len(matches) == 1:
+                found = self._search_word(index, matches[0], limit)
+            else:
+                found = self._search_words(index, matches, query_text, limit)
+            return [index.names[idx] for idx in found]
+
+    @staticmethod
+    def _search_word(index, matches, limit):
+        """Rank the names of a one-word query without scoring them all.
+
+        The postings are already in rank order, so merging them group by
+        group (best similarity first, names starting with the word before
+        the others) yields the results in order; only limit are taken.
+        """
+        found = []
+        seen = set()
+        for similarity in sorted(set(matches.values()), reverse=True):
+            word_ids = [w for w, s in matches.items() if s == similarity]
+            for postings in (index.word_first, index.word_names):
+                for idx in heapq.merge(*(postings[w] for w in word_ids),
+                                       key=index.rank):
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    found.append(idx)
+                    if len(found) == limit:
+                        return found
+        return found
+
+    @staticmethod
+    def _best(index, word_matches, within=None):
+        """Map names to the best similarity of their words to one query
+        word, optionally only for the names in within."""
+        best = {}
+        # Ascending, so each name ends up with its best similarity
+        for word_id, similarity in sorted(word_matches.items(),
+                                          key=lambda item: item[1]):
+            names = index.word_names[word_id]
+            if within is not None:
+                names = within.intersection(names)
+            best.update(dict.fromkeys(names, similarity))
+        return best
+
+    @classmethod
+    def _search_words(cls, index, matches, query_text, limit):
+        """Score the names matching every query word (or, if there are
+        fewer than limit of them, any query word)."""
+        # Start from the most selective word and narrow down from there
+        matches = sorted(matches,
+                         key=lambda word_matches: sum(
+                             len(index.word_names[w]) for w in word_matches))
+        bests = [cls._best(index, matches[0])]
+        candidates = set(bests[0])
+        for word_matches in matches[1:]:
+            bests.append(cls._best(index, word_matches, candidates))
+            candidates.intersection_update(bests[-1])
+        if len(candidates) < limit:
+            bests = [cls._best(index, word_matches) for word_matches in matches]
+            candidates = set().union(*bests)
+
+        threshold = MIN_SIMILARITY * len(matches)
+        scored = []
+        for idx in candidates:
+            similarities = [best.get(idx, 0) for best in bests]
+            total = sum(similarities)
+            if total < threshold:
+                continue
+            scored.append((len(matches) - similarities.count(0), total,
+                           index.normalized[idx].startswith(query_text),
+                           -len(index.name_words[idx]), -idx))
+        return [-key[-1] for key in heapq.nlargest(limit, scored)]
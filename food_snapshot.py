@@ -0,0 +1,73 @@
+"""Versioned on-disk snapshot of the normalized food catalog.
+
+The catalog is stored as Parquet, which keeps the compact dtypes and the
+name index, with the catalog version it was built from in the file's
+metadata (DataFrame.attrs), so one atomic replace writes both. A new
+process can then start from the snapshot and only download the catalog
+again when the version has changed, or when the snapshot is older than
+the catalog's maximum age (hand edits to the sheet do not change the
+version).
+"""
+import logging
+import os
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv('FOOD_SNAPSHOT_PATH', 'data/food_catalog.parquet')
+
+
+def load_food_snapshot(version=None, max_age=None, path=SNAPSHOT_PATH):
+    """Return the snapshot DataFrame if it matches version, else None.
+
+    A version of None means the current version is unknown (the check
+    failed), in which case any existing snapshot is returned. Otherwise a
+    snapshot saved more than max_age seconds ago is ignored too. The
+    returned frame's attrs['saved_at'] is when it was saved (epoch
+    seconds).
+    """
+    try:
+        df = pd.read_parquet(path)
+        snapshot_version = df.attrs.pop('version', None)
+        if snapshot_version is None:
+            return None
+        if version is not None:
+            saved_at = df.attrs.get('saved_at', 0)
+            if snapshot_version != version or (
+                    max_age is not None and time.time() - saved_at > max_age):
+                return None
+        return df
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning('Ignoring unreadable food snapshot: %s', e)
+        return None
+
+
+def save_food_snapshot(df, version, saved_at=None, path=SNAPSHOT_PATH):
+    """Atomically write df as the snapshot for version.
+
+    saved_at (epoch seconds, default now) should be when df was
+    downloaded.
+    """
+    if version is None:
+        return False
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        snapshot = df.copy(deep=False)
+        snapshot.attrs = {
+            'version': version,
+            'saved_at': time.time() if saved_at is None else saved_at,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        snapshot.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        # Parquet support (pyarrow) is optional; the app works without it
+        logger.warning('Could not write food snapshot: %s', e)
+        return False
@@ -0,0 +1,78 @@
+"""Columnar (DataFrame) views of meal log records."""
+import pandas as pd
+
+LOG_HEADERS = [
+    'Mobile', 'Timestamp', 'Meal Type', 'Weight', 'Basis', 'Food Name',
+    'Category', 'Calories', 'Protein', 'Carbs', 'Fat'
+]
+LOG_COLUMNS = LOG_HEADERS + ['Date', 'Time']
+NUMERIC_LOG_COLUMNS = ['Weight', 'Calories', 'Protein', 'Carbs', 'Fat']
+
+# Summary field -> log column
+SUMMARY_FIELDS = {
+    'total_calories': 'Calories',
+    'total_protein': 'Protein',
+    'total_carbs': 'Carbs',
+    'total_fat': 'Fat'
+}
+
+IST = 'Asia/Kolkata'
+
+
+def log_row(meal_data, timestamp):
+    """Return a meal log entry's cells, in LOG_HEADERS order."""
+    return [
+        meal_data['mobile'],
+        timestamp.isoformat(),
+        meal_data['meal_type'],
+        meal_data['weight'],
+        meal_data['basis'],
+        meal_data['food_name'],
+        meal_data['category'],
+        meal_data['calories'],
+        meal_data['protein'],
+        meal_data['carbs'],
+        meal_data['fat']
+    ]
+
+
+def logs_frame(records, date=None):
+    """Build a log DataFrame from record dicts in one vectorized pass.
+
+    Timestamps (ISO strings or datetimes) become tz-aware IST values,
+    'Date' is 'dd-mm-YYYY' and 'Time' is 'hh:mm AM/PM'. Rows are sorted
+    by timestamp and optionally filtered to a single 'dd-mm-YYYY' date.
+    """
+    df = pd.DataFrame.from_records(list(records), columns=LOG_HEADERS)
+    if df.empty:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+
+    timestamps = pd.to_datetime(df['Timestamp'],
+                                utc=True,
+                                format='ISO8601',
+                                errors='coerce').dt.tz_convert(IST)
+    df['Timestamp'] = timestamps
+    df['Date'] = timestamps.dt.strftime('%d-%m-%Y')
+    keep = timestamps.notna()
+    if date:
+        keep &= df['Date'] == date
+    df = df[keep].copy()
+    df['Time'] = df['Timestamp'].dt.strftime('%I:%M %p')
+
+    for col in NUMERIC_LOG_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    return df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+
+def summarize_logs(frame):
+    """Aggregate a log frame into per-date totals with a single groupby.
+
+    Returns a frame with a 'date' column followed by the total_* fields.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=['date', *SUMMARY_FIELDS])
+    totals = frame.groupby('Date', sort=False)[list(
+        SUMMARY_FIELDS.values())].sum()
+    totals.columns = list(SUMMARY_FIELDS)
+    return totals.rename_axis('date').reset_index()
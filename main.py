@@ -4,8 +4,11 @@ import plotly.graph_objects as go
 from datetime import datetime
 from utils import (calculate_calories, calculate_macros, load_food_database,
                    save_food_to_database, calculate_calories_from_macros,
-                   food_exists_in_database)
-from sheets_db import load_user_info, save_user_info, save_meal_log, get_daily_logs, delete_logs_by_date_range, get_daily_summaries
+                   food_exists_in_database, search_foods, get_food_lookup,
+                   LOGGED_NUTRIENTS)
+from storage import load_user_info, save_user_info, save_meal_logs, get_daily_logs_frame, delete_logs_by_date_range, get_daily_summaries, reset_log_context, save_recipes, delete_recipe
+from sheets_metrics import begin_rerun
+from recipes import build_recipe, load_recipes, recipe_meal_log
 
 import pytz
 
@@ -19,6 +22,12 @@ st.set_page_config(page_title="Calorie Tracker", layout="wide")
 with open('.streamlit/style.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
+# Count this rerun's Sheets API calls
+begin_rerun('Home')
+
+# Read the user's logs at most once in this rerun
+reset_log_context()
+
 # Initialize session states
 if 'daily_log' not in st.session_state:
     st.session_state.daily_log = {
@@ -28,12 +37,447 @@ if 'daily_log' not in st.session_state:
         'dinner': []
     }
 
+# Foods picked for each meal but not logged yet
+if 'staged_meals' not in st.session_state:
+    st.session_state.staged_meals = {
+        'breakfast': [],
+        'lunch': [],
+        'snacks': [],
+        'dinner': []
+    }
+
 if 'user_info' not in st.session_state:
     st.session_state.user_info = {}
 
 if 'mobile_verified' not in st.session_state:
     st.session_state.mobile_verified = False
 
+# Fragments refreshed whenever today's logs change
+LOG_FRAGMENTS = ['daily_progress', 'daily_log']
+
+MEAL_TYPES = ['breakfast', 'lunch', 'snacks', 'dinner']
+# Meal entry rows, which all list the user's recipes
+MEAL_FRAGMENTS = [f"meal_{meal_type}" for meal_type in MEAL_TYPES]
+
+
+def today_ist():
+    """Return today's date in IST, formatted as in the Daily Logs sheet."""
+    return datetime.now(ist_tz).strftime('%d-%m-%Y')
+
+
+def portion_unit_for(basis):
+    return 'p' if basis == 'p' else ('ml' if basis == 'ml' else 'gm')
+
+
+@st.fragment(key='daily_progress')
+def daily_progress(targets):
+    """Display daily totals and progress against the targets."""
+    target_calories, protein_target, fat_target, carb_target = targets
+    st.header("Daily Progress")
+
+    # Get today's logs
+    today_logs = get_daily_logs_frame(st.session_state.mobile, today_ist())
+    totals = today_logs[['Calories', 'Protein', 'Fat', 'Carbs']].sum()
+    total_calories = float(totals['Calories'])
+    total_protein = float(totals['Protein'])
+    total_fat = float(totals['Fat'])
+    total_carbs = float(totals['Carbs'])
+
+    # Calories status calculation
+    calorie_difference = target_calories - total_calories
+    status_color_calories = "#2ECC71" if calorie_difference >= 0 else "#E74C3C"
+    calories_status_text = f"{abs(calorie_difference):.0f} kcal<br> {'remaining' if calorie_difference >= 0 else 'over'}"
+    fig_calories = go.Figure()
+    fig_calories.add_trace(
+        go.Indicator(
+            mode="number",
+            value=total_calories,
+            title={
+                'text':
+                f"Total Calories<br><span style='color: {status_color_calories}'>{calories_status_text}</span>"
+            }))
+    fig_calories.update_layout(height=250)  # Update the height here
+
+    # Protein status calculation
+    protein_difference = protein_target - total_protein
+    status_color_protein = "#2ECC71" if protein_difference >= 0 else "#E74C3C"
+    protein_status_text = f"{abs(protein_difference):.0f} g<br> {'remaining' if protein_difference >= 0 else 'over'}"
+    fig_protein = go.Figure()
+    fig_protein.add_trace(
+        go.Indicator(
+            mode="number",
+            value=total_protein,
+            title={
+                'text':
+                f"Total Protein (g)<br><span style='color: {status_color_protein}'>{protein_status_text}</span>"
+            }))
+    fig_protein.update_layout(height=250)  # Update the height here
+
+    # Fat status calculation
+    fat_difference = fat_target - total_fat
+    status_color_fat = "#2ECC71" if fat_difference >= 0 else "#E74C3C"
+    fat_status_text = f"{abs(fat_difference):.0f} g<br> {'remaining' if fat_difference >= 0 else 'over'}"
+    fig_fat = go.Figure()
+    fig_fat.add_trace(
+        go.Indicator(
+            mode="number",
+            value=total_fat,
+            title={
+                'text':
+                f"Total Fat (g)<br><span style='color: {status_color_fat}'>{fat_status_text}</span>"
+            }))
+    fig_fat.update_layout(height=250)  # Update the height here
+
+    # Carbs status calculation
+    carbs_difference = carb_target - total_carbs
+    status_color_carbs = "#2ECC71" if carbs_difference >= 0 else "#E74C3C"
+    carbs_status_text = f"{abs(carbs_difference):.0f} g<br> {'remaining' if carbs_difference >= 0 else 'over'}"
+    fig_carbs = go.Figure()
+    fig_carbs.add_trace(
+        go.Indicator(
+            mode="number",
+            value=total_carbs,
+            title={
+                'text':
+                f"Total Carbs (g)<br><span style='color: {status_color_carbs}'>{carbs_status_text}</span>"
+            }))
+    fig_carbs.update_layout(height=250)  # Update the height here
+
+    # Display charts in a single row using columns
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.plotly_chart(fig_calories, use_container_width=True)
+    with col2:
+        st.plotly_chart(fig_protein, use_container_width=True)
+    with col3:
+        st.plotly_chart(fig_fat, use_container_width=True)
+    with col4:
+        st.plotly_chart(fig_carbs, use_container_width=True)
+
+
+
+def stage_food(meal_type, food_lookup):
+    """Add button callback: stage the selected food for meal_type."""
+    food_selection = st.session_state[f"food_select_{meal_type}"]
+    portion = st.session_state[f"portion_{meal_type}"]
+    basis = food_lookup.basis(food_selection)
+    st.session_state.staged_meals[meal_type].append({
+        'name': food_selection,
+        # Scale the precomputed per-unit nutrients
+        **food_lookup.scaled(food_selection, portion),
+        'portion': portion,
+        'unit': portion_unit_for(basis),
+        'basis': basis,
+        'category': food_lookup.category(food_selection)
+    })
+
+
+def clear_staged(meal_type):
+    st.session_state.staged_meals[meal_type] = []
+
+
+def log_staged(meal_type):
+    """Log button callback: save all staged foods of meal_type at once."""
+    staged = st.session_state.staged_meals[meal_type]
+    meal_logs = [{
+        'mobile': st.session_state.mobile,
+        'meal_type': meal_type,
+        'weight': item['portion'],
+        'basis': item['basis'],
+        'food_name': item['name'],
+        'category': item['category'],
+        'calories': item['calories'],
+        'protein': item['protein'],
+        'carbs': item['carbs'],
+        'fat': item['fat']
+    } for item in staged]
+
+    # Save to daily log sheet in one append; keep the items staged on error
+    if not save_meal_logs(meal_logs):
+        return
+
+    # Add to session state
+    st.session_state.daily_log[meal_type].extend(staged)
+    clear_staged(meal_type)
+
+    # Refresh only the progress panel, the Daily Log tables and this meal
+    st.rerun(LOG_FRAGMENTS + [f"meal_{meal_type}"])
+
+
+def save_staged_recipe(meal_type, food_lookup):
+    """Save as recipe callback: store the staged foods as one serving."""
+    name = st.session_state[f"recipe_name_{meal_type}"].strip()
+    if not name:
+        st.toast("Please enter a recipe name")
+        return
+    components = [[item['name'], item['portion']]
+                  for item in st.session_state.staged_meals[meal_type]]
+    try:
+        recipe = build_recipe(st.session_state.mobile, name, components, 1,
+                              food_lookup)
+    except ValueError as e:
+        st.toast(str(e))
+        return
+    if save_recipes([recipe]):
+        st.toast(f"Saved recipe '{name}'")
+        # Every meal row lists the recipes
+        st.rerun(MEAL_FRAGMENTS)
+
+
+def log_recipe(meal_type, recipes):
+    """Log recipe callback: log servings of a recipe in one write."""
+    recipe = recipes[st.session_state[f"recipe_select_{meal_type}"]]
+    servings = st.session_state[f"recipe_servings_{meal_type}"]
+    meal_log = recipe_meal_log(recipe, servings, st.session_state.mobile,
+                               meal_type)
+    if not save_meal_logs([meal_log]):
+        return
+
+    # Add to session state
+    st.session_state.daily_log[meal_type].append({
+        'name': recipe['name'],
+        'calories': meal_log['calories'],
+        'protein': meal_log['protein'],
+        'fat': meal_log['fat'],
+        'carbs': meal_log['carbs'],
+        'portion': servings,
+        'unit': meal_log['basis']
+    })
+
+    # Refresh only the progress panel, the Daily Log tables and this meal
+    st.rerun(LOG_FRAGMENTS + [f"meal_{meal_type}"])
+
+
+def remove_recipe(meal_type):
+    """Delete recipe callback."""
+    if delete_recipe(st.session_state.mobile,
+                     st.session_state[f"recipe_select_{meal_type}"]):
+        st.rerun(MEAL_FRAGMENTS)
+
+
+def meal_inputs(meal_type, food_db, food_lookup):
+    """Food search, portion and Add button for one meal."""
+    col1, col2, col3 = st.columns([2, 1, 1])
+
+    with col1:
+        # Food selection with integrated search
+        if not food_db.empty and 'Food Name' in food_db.columns:
+            # Narrow the options server-side when searching
+            search_term = st.text_input(f"Search food for {meal_type}",
+                                        key=f"food_search_{meal_type}",
+                                        placeholder="Type to search...")
+            if search_term:
+                options = [
+                    name for name in search_foods(search_term, limit=50)
+                    if name in food_lookup
+                ]
+            else:
+                options = food_db['Food Name'].tolist()
+            if not options:
+                st.info("No matching foods")
+                return
+            food_selection = st.selectbox(
+                f"Select food for {meal_type}",
+                options=options,
+                key=f"food_select_{meal_type}",
+                placeholder="Search for food...",
+            )
+        else:
+            st.warning("No foods available in database")
+            return
+
+    with col2:
+        # Get the basis for the selected food
+        basis = food_lookup.basis(food_selection)
+
+        # Display portion input with dynamic unit
+        st.number_input(f"Portion ({portion_unit_for(basis)})",
+                        min_value=0.0,
+                        max_value=1000.0,
+                        step=1.0 if basis == 'p' else 10.0,
+                        key=f"portion_{meal_type}")
+
+    with col3:
+        st.button("Add",
+                  key=f"add_{meal_type}",
+                  on_click=stage_food,
+                  args=(meal_type, food_lookup))
+
+
+def staged_foods(meal_type, food_lookup):
+    """Foods staged for one meal, their totals and the Log button."""
+    staged = st.session_state.staged_meals[meal_type]
+    if not staged:
+        return
+    staged_df = pd.DataFrame(staged)
+    # Totals are computed once over the whole batch
+    totals = staged_df[list(LOGGED_NUTRIENTS.values())].sum()
+    display_cols = [
+        'name', 'portion', 'unit', 'calories', 'protein', 'carbs', 'fat'
+    ]
+    st.dataframe(staged_df[display_cols], hide_index=True)
+    st.caption(f"Total: {totals['calories']:.0f} kcal, "
+               f"{totals['protein']:.1f}g protein, "
+               f"{totals['carbs']:.1f}g carbs, {totals['fat']:.1f}g fat")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(f"Log {len(staged)} item{'s' if len(staged) > 1 else ''}",
+                  key=f"log_{meal_type}",
+                  type="primary",
+                  on_click=log_staged,
+                  args=(meal_type, ))
+    with col2:
+        st.button("Clear",
+                  key=f"clear_{meal_type}",
+                  on_click=clear_staged,
+                  args=(meal_type, ))
+
+    # Save the staged foods as a recipe to log them in one go next time
+    col1, col2 = st.columns(2)
+    with col1:
+        st.text_input("Recipe name",
+                      key=f"recipe_name_{meal_type}",
+                      placeholder="e.g. My usual breakfast",
+                      label_visibility="collapsed")
+    with col2:
+        st.button("Save as recipe",
+                  key=f"save_recipe_{meal_type}",
+                  on_click=save_staged_recipe,
+                  args=(meal_type, food_lookup))
+
+
+def recipe_inputs(meal_type, food_lookup):
+    """Saved recipe selection, servings and Log button for one meal."""
+    recipes = {
+        recipe['name']: recipe
+        for recipe in load_recipes(st.session_state.mobile, food_lookup)
+    }
+    if not recipes:
+        return
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        selection = st.selectbox(f"Recipe for {meal_type}",
+                                 options=list(recipes),
+                                 key=f"recipe_select_{meal_type}")
+        recipe = recipes[selection]
+        st.caption(f"Per serving: {recipe['calories']:.0f} kcal, "
+                   f"{recipe['protein']:.1f}g protein, "
+                   f"{recipe['carbs']:.1f}g carbs, {recipe['fat']:.1f}g fat")
+    with col2:
+        st.number_input("Servings",
+                        min_value=0.5,
+                        max_value=20.0,
+                        value=1.0,
+                        step=0.5,
+                        key=f"recipe_servings_{meal_type}")
+    with col3:
+        st.button("Log recipe",
+                  key=f"log_recipe_{meal_type}",
+                  on_click=log_recipe,
+                  args=(meal_type, recipes))
+        st.button("Delete recipe",
+                  key=f"delete_recipe_{meal_type}",
+                  on_click=remove_recipe,
+                  args=(meal_type, ))
+
+
+def meal_row(meal_type, food_db, food_lookup):
+    """Entry row of one meal: foods are staged, then logged together."""
+    st.subheader(f"{meal_type.title()}")
+    meal_inputs(meal_type, food_db, food_lookup)
+    staged_foods(meal_type, food_lookup)
+    recipe_inputs(meal_type, food_lookup)
+
+
+@st.fragment(key='daily_log')
+def daily_log_tables():
+    """Today's logs and the day-wise summary of the Daily Log tab."""
+    # Get logs for today
+    today_logs = get_daily_logs_frame(st.session_state.mobile, today_ist())
+
+    st.subheader("Today's Calorie Intake")
+    if not today_logs.empty:
+        log_df = today_logs.copy()
+        display_cols = [
+            'Timestamp', 'Meal Type', 'Food Name', 'Category', 'Calories',
+            'Protein', 'Carbs', 'Fat'
+        ]
+
+        # Show only the (already formatted) time
+        log_df['Timestamp'] = log_df['Time']
+
+        st.dataframe(log_df[display_cols], hide_index=True)
+    else:
+        st.info("No meals logged today")
+
+    st.divider()
+
+    # Daily Summary View
+    st.subheader("Daywise Total Calorie Intake Summary")
+    summaries = get_daily_summaries(st.session_state.mobile)
+    if summaries:
+        summary_df = pd.DataFrame(summaries)
+
+        # Convert the 'date' column to datetime format for correct sorting
+        summary_df['date'] = pd.to_datetime(summary_df['date'],
+                                            format='%d-%m-%Y')
+        # Sort the summary by date in descending order
+        summary_df.sort_values(by='date', ascending=False, inplace=True)
+        # Convert 'date' back to string if needed for display
+        summary_df['date'] = summary_df['date'].dt.strftime('%d-%m-%Y')
+
+        st.dataframe(summary_df, hide_index=True)
+    else:
+        st.info("No meal history available")
+
+
+def delete_logs_in_range():
+    """Delete button callback: clear the logs between the selected dates."""
+    start_date = st.session_state.start_date
+    end_date = st.session_state.end_date
+    if start_date > end_date:
+        st.session_state.clear_logs_message = (
+            'error', "Start date must be before end date.")
+    elif delete_logs_by_date_range(st.session_state.mobile, start_date,
+                                   end_date):
+        st.session_state.clear_logs_message = (
+            'success',
+            f"Logs deleted successfully between {start_date} and {end_date}!")
+        st.rerun(LOG_FRAGMENTS + ['clear_logs'])
+    else:
+        st.session_state.clear_logs_message = ('error',
+                                               "Failed to delete logs.")
+
+
+@st.fragment(key='clear_logs')
+def clear_logs():
+    """Date range inputs and Delete button of the Daily Log tab."""
+    st.subheader("Clear Specific Logs")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.date_input("Select start date to clear logs",
+                      value=datetime.now().date(),
+                      key="start_date")
+    with col2:
+        st.date_input("Select end date to clear logs",
+                      value=datetime.now().date(),
+                      key="end_date")
+    st.button("Delete Logs in Range",
+              type="secondary",
+              on_click=delete_logs_in_range)
+
+    message = st.session_state.pop('clear_logs_message', None)
+    if message:
+        kind, text = message
+        if kind == 'success':
+            st.success(text)
+        else:
+            st.error(text)
+
+
+
 # Mobile number verification section
 if not st.session_state.mobile_verified:
     st.title("Welcome to NutriTracker")
@@ -72,6 +516,7 @@ elif st.session_state.mobile_verified:
         # Rest of the home content
         # Load food database
         food_db = load_food_database()
+        food_lookup = get_food_lookup(food_db)
 
         # Main title
         st.title("🥗 Calorie & Macro Tracker")
@@ -124,178 +569,16 @@ elif st.session_state.mobile_verified:
             st.write(f"Fat: {fat_target:.1f}g")
             st.write(f"Carbs: {carb_target:.1f}g")
 
-        # Display daily totals and progress
-        st.header("Daily Progress")
-
-        # Get today's logs from Google Sheets
-        today = datetime.now(pytz.timezone('Asia/Kolkata')).strftime(
-            '%d-%m-%Y')  # Ensure today's date is formatted correctly in IST
-        today_logs = get_daily_logs(st.session_state.mobile, today)
-        if today_logs:
-            total_calories = sum(log['Calories'] for log in today_logs)
-            total_protein = sum(log['Protein'] for log in today_logs)
-            total_fat = sum(log['Fat'] for log in today_logs)
-            total_carbs = sum(log['Carbs'] for log in today_logs)
-        else:
-            total_calories = total_protein = total_fat = total_carbs = 0
-
-        # Calories status calculation
-        calorie_difference = target_calories - total_calories
-        status_color_calories = "#2ECC71" if calorie_difference >= 0 else "#E74C3C"
-        calories_status_text = f"{abs(calorie_difference):.0f} kcal<br> {'remaining' if calorie_difference >= 0 else 'over'}"
-        fig_calories = go.Figure()
-        fig_calories.add_trace(
-            go.Indicator(
-                mode="number",
-                value=total_calories,
-                title={
-                    'text':
-                    f"Total Calories<br><span style='color: {status_color_calories}'>{calories_status_text}</span>"
-                }))
-        fig_calories.update_layout(height=250)  # Update the height here
-
-        # Protein status calculation
-        protein_difference = protein_target - total_protein
-        status_color_protein = "#2ECC71" if protein_difference >= 0 else "#E74C3C"
-        protein_status_text = f"{abs(protein_difference):.0f} g<br> {'remaining' if protein_difference >= 0 else 'over'}"
-        fig_protein = go.Figure()
-        fig_protein.add_trace(
-            go.Indicator(
-                mode="number",
-                value=total_protein,
-                title={
-                    'text':
-                    f"Total Protein (g)<br><span style='color: {status_color_protein}'>{protein_status_text}</span>"
-                }))
-        fig_protein.update_layout(height=250)  # Update the height here
-
-        # Fat status calculation
-        fat_difference = fat_target - total_fat
-        status_color_fat = "#2ECC71" if fat_difference >= 0 else "#E74C3C"
-        fat_status_text = f"{abs(fat_difference):.0f} g<br> {'remaining' if fat_difference >= 0 else 'over'}"
-        fig_fat = go.Figure()
-        fig_fat.add_trace(
-            go.Indicator(
-                mode="number",
-                value=total_fat,
-                title={
-                    'text':
-                    f"Total Fat (g)<br><span style='color: {status_color_fat}'>{fat_status_text}</span>"
-                }))
-        fig_fat.update_layout(height=250)  # Update the height here
-
-        # Carbs status calculation
-        carbs_difference = carb_target - total_carbs
-        status_color_carbs = "#2ECC71" if carbs_difference >= 0 else "#E74C3C"
-        carbs_status_text = f"{abs(carbs_difference):.0f} g<br> {'remaining' if carbs_difference >= 0 else 'over'}"
-        fig_carbs = go.Figure()
-        fig_carbs.add_trace(
-            go.Indicator(
-                mode="number",
-                value=total_carbs,
-                title={
-                    'text':
-                    f"Total Carbs (g)<br><span style='color: {status_color_carbs}'>{carbs_status_text}</span>"
-                }))
-        fig_carbs.update_layout(height=250)  # Update the height here
-
-        # Display charts in a single row using columns
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.plotly_chart(fig_calories, use_container_width=True)
-        with col2:
-            st.plotly_chart(fig_protein, use_container_width=True)
-        with col3:
-            st.plotly_chart(fig_fat, use_container_width=True)
-        with col4:
-            st.plotly_chart(fig_carbs, use_container_width=True)
-
-        # # Clear daily log button
-        # if st.button("Clear Daily Log"):
-        #     st.session_state.daily_log = {
-        #         'breakfast': [],
-        #         'lunch': [],
-        #         'snacks': [],
-        #         'dinner': []
-        #     }
-        #     st.rerun()
+        # Today's totals and the meal rows rerun on their own: adding a
+        # meal refreshes only the progress panel and that meal's row
+        daily_progress(
+            (target_calories, protein_target, fat_target, carb_target))
 
         # Food logging section
         st.header("Log Your Meals")
-        meal_types = ['breakfast', 'lunch', 'snacks', 'dinner']
-
-        for meal_type in meal_types:
-            with st.container():
-                st.subheader(f"{meal_type.title()}")
-                col1, col2, col3 = st.columns([2, 1, 1])
-
-                with col1:
-                    # Food selection with integrated search
-                    if not food_db.empty and 'Food Name' in food_db.columns:
-                        food_selection = st.selectbox(
-                            f"Select food for {meal_type}",
-                            options=food_db['Food Name'].tolist(),
-                            key=f"food_select_{meal_type}",
-                            placeholder="Search for food...",
-                        )
-                    else:
-                        st.warning("No foods available in database")
-                        continue
-
-                with col2:
-                    # Get the basis for the selected food
-                    selected_food = food_db[food_db['Food Name'] ==
-                                            food_selection].iloc[0]
-                    basis = selected_food.get('Basis', 'gm')
-
-                    # Display portion input with dynamic unit
-                    portion_unit = 'p' if basis == 'p' else (
-                        'ml' if basis == 'ml' else 'gm')
-                    portion = st.number_input(
-                        f"Portion ({portion_unit})",
-                        min_value=0.0,
-                        max_value=1000.0,
-                        step=1.0 if basis == 'p' else 10.0,
-                        key=f"portion_{meal_type}")
-
-                with col3:
-                    if st.button("Add", key=f"add_{meal_type}"):
-                        food_item = food_db[food_db['Food Name'] ==
-                                            food_selection].iloc[0]
-                        # Calculate multiplier based on basis
-                        base_weight = 100 if basis != 'p' else 1
-                        multiplier = portion / base_weight
-
-                        logged_item = {
-                            'name': food_item['Food Name'],
-                            'calories': food_item['Calories'] * multiplier,
-                            'protein': food_item['Protein'] * multiplier,
-                            'fat': food_item['Fat'] * multiplier,
-                            'carbs': food_item['Carbs'] * multiplier,
-                            'portion': portion,
-                            'unit': portion_unit
-                        }
-                        # Add to session state
-                        st.session_state.daily_log[meal_type].append(
-                            logged_item)
-
-                        # Save to daily log sheet
-                        meal_log = {
-                            'mobile': st.session_state.mobile,
-                            'meal_type': meal_type,
-                            'weight': portion,
-                            'basis': basis,
-                            'food_name': food_item['Food Name'],
-                            'category': food_item.get('Category', 'N/A'),
-                            'calories': logged_item['calories'],
-                            'protein': logged_item['protein'],
-                            'carbs': logged_item['carbs'],
-                            'fat': logged_item['fat']
-                        }
-                        save_meal_log(meal_log)
-
-                        # Rerun to refresh the chart/UI
-                        st.rerun()
+        for meal_type in MEAL_TYPES:
+            st.fragment(meal_row, key=f"meal_{meal_type}")(meal_type, food_db,
+                                                           food_lookup)
 
     with tabs[1]:  # Add Food tab
         st.header("Add New Food")
@@ -406,8 +689,7 @@ elif st.session_state.mobile_verified:
                         st.success("Food added successfully!")
                         # Set reset flag
                         st.session_state['reset_form'] = True
-                        # Reload the food database
-                        st.cache_data.clear()
+                        # The food catalog region was invalidated on save
                         st.rerun()
 
         # Load food database
@@ -417,75 +699,12 @@ elif st.session_state.mobile_verified:
         # st.header("Daily Log")
         # st.divider()
 
-        # Today's date for filtering
-        from datetime import datetime
-        today = datetime.now(pytz.timezone('Asia/Kolkata')).strftime(
-            '%d-%m-%Y')  # Ensure today's date is formatted correctly in IST
-
-        # Get logs for today
-        today_logs = get_daily_logs(st.session_state.mobile, today)
-
-        st.subheader("Today's Calorie Intake")
-        if today_logs:
-            log_df = pd.DataFrame(today_logs)
-            display_cols = [
-                'Timestamp', 'Meal Type', 'Food Name', 'Category', 'Calories',
-                'Protein', 'Carbs', 'Fat'
-            ]
-
-            # Format timestamp to show only time
-            log_df['Timestamp'] = pd.to_datetime(
-                log_df['Timestamp']).dt.strftime('%I:%M %p')
-
-            st.dataframe(log_df[display_cols], hide_index=True)
-        else:
-            st.info("No meals logged today")
-
-        st.divider()
-
-        # Daily Summary View
-        st.subheader("Daywise Total Calorie Intake Summary")
-        summaries = get_daily_summaries(st.session_state.mobile)
-        if summaries:
-            summary_df = pd.DataFrame(summaries)
-
-            # Convert the 'date' column to datetime format for correct sorting
-            summary_df['date'] = pd.to_datetime(summary_df['date'],
-                                                format='%d-%m-%Y')
-            # Sort the summary by date in descending order
-            summary_df.sort_values(by='date', ascending=False, inplace=True)
-            # Convert 'date' back to string if needed for display
-            summary_df['date'] = summary_df['date'].dt.strftime('%d-%m-%Y')
-
-            st.dataframe(summary_df, hide_index=True)
-        else:
-            st.info("No meal history available")
+        daily_log_tables()
 
         st.divider()
 
         # Delete Logs Section
-        st.subheader("Clear Specific Logs")
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input("Select start date to clear logs",
-                                       value=datetime.now().date(),
-                                       key="start_date")
-        with col2:
-            end_date = st.date_input("Select end date to clear logs",
-                                     value=datetime.now().date(),
-                                     key="end_date")
-        if st.button("Delete Logs in Range", type="secondary"):
-            if start_date > end_date:
-                st.error("Start date must be before end date.")
-            else:
-                if delete_logs_by_date_range(st.session_state.mobile,
-                                             start_date, end_date):
-                    st.success(
-                        f"Logs deleted successfully between {start_date} and {end_date}!"
-                    )
-                    st.rerun()
-                else:
-                    st.error("Failed to delete logs.")
+        clear_logs()
 
     with tabs[3]:  # Developer Details Tab
         st.subheader("It’s Basically AI 🤖")
@@ -1,13 +1,19 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String
+from itertools import chain
+
+from sqlalchemy import (create_engine, event, update, Column, Integer, Float,
+                        String, Date, DateTime, Index, UniqueConstraint)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
-# Get database URL from environment variable
-DATABASE_URL = os.getenv('DATABASE_URL')
+# Get database URL from environment variable (local SQLite file by default)
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///data/nutritrackr.db')
 
-# Create database engine
-engine = create_engine(DATABASE_URL)
+# Create database engine; Streamlit serves sessions from several threads
+connect_args = ({
+    'check_same_thread': False
+} if DATABASE_URL.startswith('sqlite') else {})
+engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create declarative base
@@ -23,10 +29,108 @@ class FoodItem(Base):
     protein = Column(Float)
     fat = Column(Float)
     carbs = Column(Float)
+    weight = Column(Float, default=100.0)
+    basis = Column(String, default='gm')
+    category = Column(String, default='veg')
+    fibre = Column(Float, default=0.0)
+    avg_weight = Column(String, default='')
+    source = Column(String, default='')
+
+
+class User(Base):
+    """User profile and macro settings, keyed by mobile number."""
+    __tablename__ = "users"
+
+    mobile = Column(String, primary_key=True)
+    full_name = Column(String)
+    weight = Column(Float)
+    calorie_mode = Column(String, default='maintenance')
+    protein_per_kg = Column(Float)
+    fat_percent = Column(Float)
+    last_updated = Column(DateTime)
+
+
+class MealLog(Base):
+    """A single logged food entry."""
+    __tablename__ = "meal_logs"
+    __table_args__ = (Index('ix_meal_logs_mobile_date', 'mobile',
+                            'log_date'), )
+
+    id = Column(Integer, primary_key=True)
+    mobile = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)  # IST, naive
+    log_date = Column(Date, nullable=False)  # IST calendar date
+    meal_type = Column(String)
+    weight = Column(Float)
+    basis = Column(String)
+    food_name = Column(String)
+    category = Column(String)
+    calories = Column(Float)
+    protein = Column(Float)
+    carbs = Column(Float)
+    fat = Column(Float)
+
+
+class DailySummary(Base):
+    """Per-user, per-date macro totals maintained alongside meal_logs."""
+    __tablename__ = "daily_summaries"
+
+    mobile = Column(String, primary_key=True)
+    log_date = Column(Date, primary_key=True)
+    total_calories = Column(Float, default=0.0)
+    total_protein = Column(Float, default=0.0)
+    total_carbs = Column(Float, default=0.0)
+    total_fat = Column(Float, default=0.0)
+
+
+class Recipe(Base):
+    """A saved meal template with its macro totals per serving."""
+    __tablename__ = "recipes"
+    __table_args__ = (UniqueConstraint('mobile', 'name'), )
+
+    id = Column(Integer, primary_key=True)
+    mobile = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    components = Column(String)  # JSON list of [food name, portion]
+    servings = Column(Float, default=1.0)
+    calories = Column(Float)
+    protein = Column(Float)
+    carbs = Column(Float)
+    fat = Column(Float)
+    fingerprint = Column(String)  # Catalog values the totals came from
+    updated = Column(DateTime)
+
+
+class AppMeta(Base):
+    """Counters kept by the app, such as the food catalog version."""
+    __tablename__ = "app_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+
+
+# AppMeta key of the counter bumped by every change to food_items
+FOOD_CATALOG_VERSION = 'food_catalog_version'
+
+
+@event.listens_for(SessionLocal, 'before_flush')
+def _bump_food_catalog_version(session, flush_context, instances):
+    """Bump the catalog version in the same transaction as a food change."""
+    if any(isinstance(obj, FoodItem)
+           for obj in chain(session.new, session.dirty, session.deleted)):
+        session.execute(
+            update(AppMeta).where(AppMeta.key == FOOD_CATALOG_VERSION).values(
+                value=AppMeta.value + 1))
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
 
+# Seed the counters, so bumping them is a single UPDATE
+with SessionLocal() as _db:
+    if _db.get(AppMeta, FOOD_CATALOG_VERSION) is None:
+        _db.add(AppMeta(key=FOOD_CATALOG_VERSION, value=0))
+        _db.commit()
+
 def get_db():
     """Get database session."""
     db = SessionLocal()
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils import load_food_database
-from sheets_db import delete_food
+from utils import load_food_database, search_foods
+from storage import delete_food
+from sheets_metrics import begin_rerun
 
 # Page config
 st.set_page_config(page_title="Food Database", page_icon="🗄️", layout="wide")
@@ -10,6 +11,9 @@ st.set_page_config(page_title="Food Database", page_icon="🗄️", layout="wide
 with open('.streamlit/style.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
+# Count this rerun's Sheets API calls
+begin_rerun('Food Database')
+
 # Page title
 st.title("🗄️ Food Database")
 
@@ -45,10 +49,10 @@ st.header("Food Items")
 # Add search functionality with autocomplete
 search_term = st.text_input("Search foods", "")
 
-# Filter the database based on search
+# Filter the database based on search (typo-tolerant, best matches)
 if search_term and 'Food Name' in food_db.columns:
-    filtered_db = food_db[food_db['Food Name'].str.contains(search_term,
-                                                            case=False)]
+    matches = search_foods(search_term, limit=100)
+    filtered_db = food_db[food_db['Food Name'].isin(matches)]
 else:
     filtered_db = food_db
 
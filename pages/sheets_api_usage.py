@@ -0,0 +1,105 @@
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+from sheets_limiter import READ_QUOTA, WRITE_QUOTA, limiter
+from sheets_metrics import LATENCY_BUCKETS, begin_rerun, metrics
+
+# Page config
+st.set_page_config(page_title="Sheets API Usage", page_icon="📈", layout="wide")
+
+# Load custom CSS
+with open('.streamlit/style.css') as f:
+    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+
+# Count this rerun's Sheets API calls
+begin_rerun('Sheets API Usage')
+
+st.title("📈 Sheets API Usage")
+
+# Only verified users whose mobile number is in ADMIN_MOBILES may see the
+# page; with no admins configured it is closed to everyone
+admins = [m.strip() for m in os.getenv('ADMIN_MOBILES', '').split(',') if m.strip()]
+if not st.session_state.get('mobile_verified', False) or \
+        str(st.session_state.get('mobile', '')).strip() not in admins:
+    st.warning("This page is only available to administrators.")
+    st.stop()
+
+snapshot = metrics.snapshot()
+calls = pd.DataFrame(snapshot['calls'])
+
+# Quota usage over the last minute
+st.header("Last Minute")
+last_minute = snapshot['last_minute']
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Read Requests", f"{last_minute['read']} / {READ_QUOTA}")
+    st.progress(min(last_minute['read'] / READ_QUOTA, 1.0))
+    st.caption(f"{limiter.buckets['read'].available():.0f} tokens left")
+with col2:
+    st.metric("Write Requests", f"{last_minute['write']} / {WRITE_QUOTA}")
+    st.progress(min(last_minute['write'] / WRITE_QUOTA, 1.0))
+    st.caption(f"{limiter.buckets['write'].available():.0f} tokens left")
+with col3:
+    st.metric("Drive Requests", last_minute['drive'])
+with col4:
+    quota_errors = int(calls['quota_errors'].sum()) if not calls.empty else 0
+    st.metric("Quota Errors (total)", quota_errors)
+
+# Calls per code path
+st.header("Calls by Code Path")
+if calls.empty:
+    st.info("No Sheets API calls recorded yet.")
+else:
+    by_caller = calls.groupby('caller')[[
+        'calls', 'errors', 'quota_errors', 'rows', 'total_latency_s'
+    ]].sum().sort_values('calls', ascending=False)
+    st.dataframe(by_caller, use_container_width=True)
+
+    st.subheader("Operations")
+    st.dataframe(calls.drop(columns=['latency_buckets']).sort_values(
+        'calls', ascending=False),
+                 hide_index=True,
+                 use_container_width=True)
+
+    st.subheader("Latency Histogram")
+    labels = [f"≤{bound}s" for bound in LATENCY_BUCKETS] + [
+        f">{LATENCY_BUCKETS[-1]}s"
+    ]
+    histogram = pd.DataFrame([row['latency_buckets'] for row in snapshot['calls']],
+                             index=calls['operation']).groupby(level=0).sum()
+    histogram.columns = labels
+    st.bar_chart(histogram.T)
+
+# Calls per rerun
+st.header("Recent Reruns")
+reruns = pd.DataFrame(snapshot['reruns'])
+if reruns.empty:
+    st.info("No reruns recorded yet.")
+else:
+    reruns['started'] = pd.to_datetime(reruns['started'], unit='s')
+    reruns['session'] = reruns['session'].str[:8]
+    reruns['calls'] = reruns['calls'].apply(
+        lambda c: ', '.join(f"{op}×{n}" for op, n in sorted(c.items())))
+    st.dataframe(reruns.sort_values('started', ascending=False),
+                 hide_index=True,
+                 use_container_width=True)
+
+# Exports
+st.header("Export")
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.download_button("Download JSON",
+                       json.dumps(snapshot, indent=2),
+                       file_name="sheets_api_metrics.json",
+                       mime="application/json")
+with col2:
+    st.download_button("Download Prometheus metrics",
+                       metrics.prometheus_text(),
+                       file_name="sheets_api_metrics.prom",
+                       mime="text/plain")
+with col3:
+    if st.button("Reset metrics"):
+        metrics.reset()
+        st.rerun()
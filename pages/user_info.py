@@ -1,5 +1,6 @@
 import streamlit as st
-from sheets_db import load_user_info, save_user_info
+from storage import load_user_info, save_user_info
+from sheets_metrics import begin_rerun
 
 # Page config
 st.set_page_config(page_title="User Information", page_icon="👤", layout="wide")
@@ -8,6 +9,9 @@ st.set_page_config(page_title="User Information", page_icon="👤", layout="wide
 with open('.streamlit/style.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
+# Count this rerun's Sheets API calls
+begin_rerun('User Information')
+
 st.title("👤 User Information")
 
 
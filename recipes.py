@@ -0,0 +1,101 @@
+"""Saved recipes (meal templates) with precomputed macro totals.
+
+A recipe is a list of [food name, portion] components making a number
+of servings. Its macros per serving are computed from the catalog once,
+when it is saved, and stored with a fingerprint of the catalog values
+they came from. Loading a user's recipes only recomputes (and saves)
+the ones whose component foods changed since, so logging a recipe is a
+single lookup and a single meal log row.
+"""
+import hashlib
+
+import numpy as np
+
+from storage import get_recipes, save_recipes
+from utils import LOGGED_DECIMALS, LOGGED_NUTRIENTS
+
+# Basis and category of the meal log rows of logged recipes
+RECIPE_BASIS = 'serving'
+RECIPE_CATEGORY = 'recipe'
+
+
+def _rows(components, food_lookup):
+    """Return the catalog rows of the components, or None if one is gone."""
+    rows = [food_lookup.row(name) for name, _ in components]
+    return None if None in rows else rows
+
+
+def fingerprint(components, food_lookup):
+    """Return a hash of the components' per-unit catalog nutrients.
+
+    Returns None if a component food is not in the catalog.
+    """
+    rows = _rows(components, food_lookup)
+    if rows is None:
+        return None
+    digest = hashlib.sha1()
+    for (name, _), row in zip(components, rows):
+        digest.update(name.encode())
+        digest.update(food_lookup.per_unit[row].tobytes())
+    return digest.hexdigest()[:16]
+
+
+def build_recipe(mobile, name, components, servings, food_lookup) -> dict:
+    """Return a recipe dict with its macros per serving computed.
+
+    Raises ValueError if a component food is not in the catalog.
+    """
+    rows = _rows(components, food_lookup)
+    if rows is None:
+        raise ValueError(f"Recipe '{name}' uses a food missing from the "
+                         "database")
+    portions = np.array([float(portion) for _, portion in components])
+    totals = (food_lookup.per_unit[rows] *
+              portions[:, None]).sum(axis=0) / float(servings)
+    return {
+        'mobile': str(mobile).strip(),
+        'name': name,
+        'components': [[food, float(portion)] for food, portion in components],
+        'servings': float(servings),
+        **{
+            field: round(value, LOGGED_DECIMALS)
+            for field, value in zip(LOGGED_NUTRIENTS.values(), totals.tolist())
+        },
+        'fingerprint': fingerprint(components, food_lookup)
+    }
+
+
+def load_recipes(mobile, food_lookup) -> list:
+    """Return a user's recipes, recomputing those whose foods changed.
+
+    Recomputed recipes are saved back in one write. Recipes with a food
+    no longer in the catalog keep their stored totals.
+    """
+    recipes = get_recipes(mobile)
+    changed = {}
+    for recipe in recipes:
+        current = fingerprint(recipe['components'], food_lookup)
+        if current is not None and current != recipe['fingerprint']:
+            changed[recipe['name']] = build_recipe(mobile, recipe['name'],
+                                                   recipe['components'],
+                                                   recipe['servings'],
+                                                   food_lookup)
+    if changed:
+        save_recipes(list(changed.values()))
+    return [changed.get(recipe['name'], recipe) for recipe in recipes]
+
+
+def recipe_meal_log(recipe, servings, mobile, meal_type) -> dict:
+    """Return the meal log entry for servings of a recipe."""
+    return {
+        'mobile': mobile,
+        'meal_type': meal_type,
+        'weight': servings,
+        'basis': RECIPE_BASIS,
+        'food_name': recipe['name'],
+        'category': RECIPE_CATEGORY,
+        **{
+            field: round(recipe[field] * servings, LOGGED_DECIMALS)
+            for field in LOGGED_NUTRIENTS.values()
+        }
+    }
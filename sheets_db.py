@@ -1,69 +1,192 @@
+import bisect
 import json
+import threading
+import uuid
 import gspread
+from gspread.utils import (a1_to_rowcol, convert_credentials, numericise_all,
+                           rowcol_to_a1)
 from oauth2client.service_account import ServiceAccountCredentials
+from requests.adapters import HTTPAdapter
 import os
 import pandas as pd
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
+from cache_regions import UNCHANGED
+from fake_sheets import get_fake_client
+from food_index import FoodNameIndex
+from sheets_metrics import instrument, pass_through
+from log_frames import (LOG_HEADERS, SUMMARY_FIELDS, log_row, logs_frame,
+                        summarize_logs)
+from write_behind import MealLogWriter
+
 # Prepare row data
 ist_tz = pytz.timezone('Asia/Kolkata')  # Define the IST timezone
 
 
-def get_user_sheet():
-    """Get the user data sheet."""
-    try:
-        client = get_sheets_client()
-        spreadsheet = client.open("DB's Food Database")
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent reads into a single API request.
 
-        # Get all worksheets
-        worksheets = spreadsheet.worksheets()
-        users_sheet = None
+    The first caller for a key runs the read; callers arriving while it
+    is in flight wait for it and share its result (and its error), so
+    results must be treated as read-only. Writes call forget() so that
+    later readers do not join a read that started before the write.
+    """
 
-        # Look for existing Users sheet
-        for worksheet in worksheets:
-            if worksheet.title == 'Users':
-                users_sheet = worksheet
-                break
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    @pass_through
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
 
-        # If Users sheet doesn't exist, create it
-        if not users_sheet:
-            users_sheet = spreadsheet.add_worksheet('Users', 1, 6)
+    def forget(self, *prefix):
+        """Stop new callers from joining in-flight reads under prefix."""
+        with self._lock:
+            for key in [k for k in self._flights
+                        if k[:len(prefix)] == prefix]:
+                del self._flights[key]
 
-        return users_sheet
+
+_flights = SingleFlight()
+
+
+def get_user_sheet():
+    """Get the user data sheet."""
+    try:
+        # Users sheet is created with its headers if it doesn't exist
+        return _registry.worksheet(USERS_SHEET, 1, len(USER_HEADERS),
+                                   USER_HEADERS)
 
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error getting user sheet: {str(e)}")
         raise
 
 
-def save_user_info(user_data):
-    """Save user information to the sheet."""
-    try:
-        sheet = get_user_sheet()
-        headers = sheet.row_values(1)
-        expected_headers = [
-            'mobile', 'full_name', 'weight', 'calorie_mode', 'protein_per_kg',
-            'fat_percent', 'last_updated'
-        ]
+def _user_values(mobile, user_data):
+    """Normalize the stored user fields so saved rows can be compared."""
+    return (str(mobile).strip(), str(user_data.get('full_name', '')),
+            float(user_data.get('weight', 0) or 0),
+            str(user_data.get('calorie_mode', '')),
+            float(user_data.get('protein_per_kg', 0) or 0),
+            float(user_data.get('fat_percent', 0) or 0))
 
-        # Add headers if sheet is empty
-        if not any(headers):
-            sheet.append_row(expected_headers)
 
+class UserRowIndex:
+    """Cached mobile -> row index of the Users sheet.
+
+    Also remembers the values last written for each user, so that saves
+    which would not change anything can be skipped without a request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None
+        self._saved = {}
+
+    def load(self, records):
+        """Rebuild the index from get_all_records() output."""
+        with self._lock:
+            self._rows = {}
+            for idx, record in enumerate(records):
+                mobile = str(record.get('mobile', '')).strip()
+                if not mobile or mobile in self._rows:
+                    continue
+                self._rows[mobile] = idx + 2  # +2 for header and 1-based index
+                self._saved[mobile] = _user_values(mobile, record)
+
+    def row(self, sheet, mobile):
+        """Return the row of mobile, reading the mobile column once."""
+        with self._lock:
+            if self._rows is None:
+                headers = _registry.headers(USERS_SHEET)
+                col = headers.index('mobile') + 1 if 'mobile' in headers else 1
+                self._rows = {}
+                for idx, value in enumerate(sheet.col_values(col)[1:]):
+                    self._rows.setdefault(str(value).strip(), idx + 2)
+            return self._rows.get(str(mobile).strip())
+
+    def add(self, mobile, row):
+        with self._lock:
+            if self._rows is not None and row:
+                self._rows[str(mobile).strip()] = row
+
+    def is_saved(self, mobile, values):
+        with self._lock:
+            return self._saved.get(str(mobile).strip()) == values
+
+    def mark_saved(self, mobile, values):
+        with self._lock:
+            self._saved[str(mobile).strip()] = values
+
+    def clear(self):
+        with self._lock:
+            self._rows = None
+            self._saved = {}
+
+
+_user_index = UserRowIndex()
+
+
+def save_user_info(user_data):
+    """Save user information to the sheet.
+
+    Unchanged data is not written again (UNCHANGED is returned);
+    otherwise the user's row is written with a single batch_update.
+    """
+    try:
         # Get mobile number as user_id
         mobile = user_data.get('mobile') or st.session_state.get('mobile')
         if not mobile:
             raise ValueError("Mobile number is required")
 
+        values = _user_values(mobile, user_data)
+        if _user_index.is_saved(mobile, values):
+            return UNCHANGED
+
+        sheet = get_user_sheet()
+        headers = _registry.headers(USERS_SHEET)
+
+        # Add headers if sheet is empty
+        if not any(headers):
+            sheet.append_row(USER_HEADERS)
+            _registry.set_headers(USERS_SHEET, USER_HEADERS)
+
         # Find existing user row
-        all_rows = sheet.get_all_records()
-        user_row = None
-        for idx, row in enumerate(all_rows):
-            if str(row.get('mobile', '')).strip() == str(mobile).strip():
-                user_row = idx + 2  # +2 for header and 1-based index
-                break
+        user_row = _user_index.row(sheet, mobile)
 
         # Prepare row data
         row_data = [
@@ -74,22 +197,40 @@ def save_user_info(user_data):
         ]
 
         if user_row:
-            # Update existing row
-            for i, value in enumerate(row_data):
-                sheet.update_cell(user_row, i + 1, value)
+            # Update the whole row range in one request
+            row_range = 'A{0}:{1}'.format(
+                user_row, rowcol_to_a1(user_row, len(row_data)))
+            sheet.batch_update([{'range': row_range, 'values': [row_data]}],
+                               value_input_option='USER_ENTERED')
         else:
             # Add new row
-            sheet.append_row(row_data)
+            response = sheet.append_row(row_data)
+            _user_index.add(mobile, _appended_row(response))
 
+        _user_index.mark_saved(mobile, values)
+        _flights.forget('records', USERS_SHEET)
         return True
     except ValueError as e:
         st.error(f"Error saving user data: {str(e)}")
         return False
     except Exception as e:
+        if _registry.invalidate_if_missing(e):
+            _user_index.clear()
         st.error(f"Error saving user data: {str(e)}")
         return False
 
 
+def _appended_row(response):
+    """Return the first row number written by an append, if known."""
+    try:
+        updated_range = response['updates']['updatedRange']
+        start = updated_range.split('!')[-1].split(':')[0]
+        return a1_to_rowcol(start)[0]
+    except (KeyError, TypeError, IndexError, ValueError,
+            gspread.exceptions.IncorrectCellLabel):
+        return None
+
+
 def load_user_info():
     """Load user information from the sheet."""
     try:
@@ -98,7 +239,11 @@ def load_user_info():
         if not mobile:
             return None
 
-        user_data_rows = sheet.get_all_records()
+        # Concurrent sessions share one read of the Users sheet
+        user_data_rows = _flights.do(('records', USERS_SHEET),
+                                     sheet.get_all_records)
+        # Reuse the full read to seed the row index for later saves
+        _user_index.load(user_data_rows)
         # Filter rows for current user and sort by last_updated
         user_rows = [
             row for row in user_data_rows
@@ -120,34 +265,62 @@ def load_user_info():
             'fat_percent': float(latest_row.get('fat_percent', 0.25))
         }
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error loading user data: {str(e)}")
         return None
 
 
-def get_sheets_client():
-    """Initialize and return Google Sheets client."""
-    try:
-        # Load credentials from environment variable
+# Scopes requested for the service account - explicitly include both APIs
+SCOPES = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive',
+    'https://www.googleapis.com/auth/spreadsheets'
+]
+
+# Keep-alive connections the shared client keeps open to the API
+CONNECTION_POOL_SIZE = int(os.getenv('SHEETS_CONNECTION_POOL_SIZE', '8'))
+
+# Use the in-memory fake instead of Google Sheets (no credentials needed)
+FAKE_SHEETS = os.getenv('SHEETS_BACKEND', 'google').lower() == 'fake'
+
+
+class SheetsClientCache:
+    """Thread-safe, process-wide cache of one long-lived gspread client.
+
+    The spreadsheet and worksheet handles are resolved once and cached
+    for the life of the process, so they all use the client they were
+    opened with; one client with a keep-alive connection pool sized for
+    concurrent sessions serves every request. Credentials are parsed and
+    the Drive connectivity probe runs only when it is created; the
+    authorized session refreshes the token before it expires.
+    """
+
+    def __init__(self, pool_size=CONNECTION_POOL_SIZE):
+        self.pool_size = max(1, pool_size)
+        self._lock = threading.Lock()
+        self._client = None
+
+    def _load_credentials(self):
+        """Parse the service account credentials from the environment."""
         creds_json = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
         if not creds_json:
             raise ValueError(
                 "Google Sheets credentials not found in environment")
 
         credentials_dict = json.loads(creds_json)
-
-        # Define the scope - explicitly include both APIs
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive',
-            'https://www.googleapis.com/auth/spreadsheets'
-        ]
-
-        # Authorize with credentials
         creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            credentials_dict, scope)
-        client = gspread.authorize(creds)
+            credentials_dict, SCOPES)
+        return convert_credentials(creds)
+
+    def _new_client(self):
+        """Authorize a new client with a keep-alive connection pool."""
+        client = gspread.authorize(self._load_credentials())
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        client.http_client.session.mount('https://', adapter)
+        return client
 
-        # Test the connection by listing spreadsheets
+    def _verify(self, client):
+        """Test the connection once by listing spreadsheets."""
         try:
             client.list_spreadsheet_files()
         except Exception as e:
@@ -157,7 +330,30 @@ def get_sheets_client():
                 )
             raise
 
-        return client
+    def get(self):
+        """Return the authorized client, creating it on first use."""
+        with self._lock:
+            if self._client is None:
+                client = self._new_client()
+                self._verify(client)
+                self._client = client
+            return self._client
+
+    def reset(self):
+        """Drop the client, e.g. after a credential change."""
+        with self._lock:
+            self._client = None
+
+
+_client_cache = SheetsClientCache()
+
+
+def get_sheets_client():
+    """Return the shared, authorized, instrumented Google Sheets client."""
+    if FAKE_SHEETS:
+        return instrument(get_fake_client())
+    try:
+        return instrument(_client_cache.get())
     except json.JSONDecodeError:
         st.error("Invalid JSON format in Google Sheets credentials")
         raise
@@ -166,15 +362,127 @@ def get_sheets_client():
         raise
 
 
+# Spreadsheet holding the food database, user and log worksheets
+SPREADSHEET_NAME = "DB's Food Database"
+
+USERS_SHEET = 'Users'
+DAILY_LOGS_SHEET = 'Daily Logs'
+RECIPES_SHEET = 'Recipes'
+META_SHEET = 'Meta'
+
+USER_HEADERS = [
+    'mobile', 'full_name', 'weight', 'calorie_mode', 'protein_per_kg',
+    'fat_percent', 'last_updated'
+]
+
+META_HEADERS = ['Key', 'Value']
+
+# Row of the Meta sheet holding the food catalog version
+CATALOG_VERSION_ROW = 2
+CATALOG_VERSION_KEY = 'food_catalog_version'
+
+# Components is a JSON list of [food name, portion]; the macros are per
+# serving and Fingerprint identifies the catalog values they came from
+RECIPE_HEADERS = [
+    'Mobile', 'Recipe Name', 'Components', 'Servings', 'Calories', 'Protein',
+    'Carbs', 'Fat', 'Fingerprint', 'Updated'
+]
+
+
+class WorksheetRegistry:
+    """Resolves spreadsheet and worksheet handles once and caches them.
+
+    Each entry keeps the worksheet handle, its id and its header row, so
+    regular reads and writes need no metadata requests. Entries are only
+    re-resolved after a not-found error has invalidated them.
+    """
+
+    def __init__(self, spreadsheet_name=SPREADSHEET_NAME):
+        self.spreadsheet_name = spreadsheet_name
+        self._lock = threading.RLock()
+        self._spreadsheet = None
+        self._entries = {}
+
+    def spreadsheet(self):
+        """Return the cached spreadsheet handle."""
+        with self._lock:
+            if self._spreadsheet is None:
+                client = get_sheets_client()
+                self._spreadsheet = client.open(self.spreadsheet_name)
+            return self._spreadsheet
+
+    def _resolve(self, title, rows, cols, headers):
+        """Look up (or create) a worksheet and read its header row."""
+        spreadsheet = self.spreadsheet()
+        if title is None:
+            sheet = spreadsheet.sheet1
+            return {'sheet': sheet, 'id': sheet.id,
+                    'headers': sheet.row_values(1)}
+
+        try:
+            sheet = spreadsheet.worksheet(title)
+        except gspread.WorksheetNotFound:
+            sheet = spreadsheet.add_worksheet(title, rows, cols)
+            if headers:
+                sheet.append_row(headers)
+            return {'sheet': sheet, 'id': sheet.id,
+                    'headers': list(headers or [])}
+
+        return {'sheet': sheet, 'id': sheet.id,
+                'headers': sheet.row_values(1)}
+
+    def _entry(self, title, rows=1, cols=1, headers=None):
+        with self._lock:
+            entry = self._entries.get(title)
+            if entry is None:
+                entry = self._resolve(title, rows, cols, headers)
+                self._entries[title] = entry
+            return entry
+
+    def worksheet(self, title=None, rows=1, cols=1, headers=None):
+        """Return the worksheet called title (None for the first sheet).
+
+        A missing worksheet is created with the given size and headers.
+        """
+        return self._entry(title, rows, cols, headers)['sheet']
+
+    def headers(self, title=None):
+        """Return the cached header row of a resolved worksheet."""
+        return self._entry(title)['headers']
+
+    def set_headers(self, title, headers):
+        """Record a header row written by the caller."""
+        with self._lock:
+            if title in self._entries:
+                self._entries[title]['headers'] = list(headers)
+
+    def invalidate(self):
+        """Forget all handles so they are resolved again on next use."""
+        with self._lock:
+            self._spreadsheet = None
+            self._entries = {}
+
+    def invalidate_if_missing(self, error):
+        """Invalidate the cached handles if error means one went away."""
+        missing = isinstance(
+            error, (gspread.WorksheetNotFound, gspread.SpreadsheetNotFound))
+        if isinstance(error, gspread.exceptions.APIError):
+            missing = error.code == 404 or (
+                error.code == 400 and 'Unable to parse range' in str(error))
+        if missing:
+            self.invalidate()
+        return missing
+
+
+_registry = WorksheetRegistry()
+
+
 def get_sheet():
     """Get the existing food database sheet."""
     try:
-        client = get_sheets_client()
         try:
-            sheet = client.open("DB's Food Database").sheet1
-            # Test sheet access
-            sheet.row_values(1)
-            return sheet
+            # Resolving the sheet reads its header row, testing access once
+            return _registry.worksheet()
         except gspread.SpreadsheetNotFound:
             st.error(
                 "Could not find the sheet 'DB's Food Database'. Please make sure the sheet exists and is shared with the service account."
@@ -188,12 +496,55 @@ def get_sheet():
             raise
 
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error accessing sheet: {str(e)}")
         raise
 
 
-def delete_food(food_name: str) -> bool:
-    """Delete a food item from the sheet."""
+def _row_ranges(rows):
+    """Group 1-based row numbers into contiguous (start, end) ranges."""
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in ranges]
+
+
+def _merge_ranges(ranges, gap):
+    """Merge (start, end) ranges separated by at most gap rows."""
+    merged = []
+    for start, end in ranges:
+        if merged and start - merged[-1][1] - 1 <= gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def delete_row_ranges(sheet, rows):
+    """Delete the given 1-based rows with a single batchUpdate request."""
+    # Bottom-up so earlier deletions don't shift the later ranges
+    requests = [{
+        'deleteDimension': {
+            'range': {
+                'sheetId': sheet.id,
+                'dimension': 'ROWS',
+                'startIndex': start - 1,
+                'endIndex': end
+            }
+        }
+    } for start, end in reversed(_row_ranges(rows))]
+    if requests:
+        sheet.spreadsheet.batch_update({'requests': requests})
+    return len(requests)
+
+
+def delete_food(food_names) -> bool:
+    """Delete one food item, or a list of them, from the sheet."""
+    if isinstance(food_names, str):
+        food_names = [food_names]
     try:
         sheet = get_sheet()
         # Get all values including headers
@@ -213,65 +564,127 @@ def delete_food(food_name: str) -> bool:
             st.error("Could not find 'Food Name' column in sheet")
             return False
 
-        # Search for the food item
-        target_name = food_name.strip().lower()
-        found_idx = None
-
+        # Search for the first row of each food item
+        targets = {name.strip().lower(): name for name in food_names}
+        found_rows = {}
         for idx, row in enumerate(data_rows):
+            if food_name_col >= len(row):
+                continue
             current_food = row[food_name_col].strip().lower()
-            if current_food == target_name:
-                found_idx = idx
-                break
-
-        if found_idx is not None:
-            # Add 2 to account for 1-based indexing and header row
-            row_to_delete = found_idx + 2
-            sheet.delete_rows(row_to_delete)
-            return True
-        else:
-            st.error(f"Food item '{food_name}' not found in database")
+            if current_food in targets and current_food not in found_rows:
+                # Add 2 to account for 1-based indexing and header row
+                found_rows[current_food] = idx + 2
+
+        missing = [
+            name for key, name in targets.items() if key not in found_rows
+        ]
+        for name in missing:
+            st.error(f"Food item '{name}' not found in database")
+
+        if not found_rows:
             return False
 
+        delete_row_ranges(sheet, found_rows.values())
+        # Rows below the deleted ones have moved
+        _food_rows.reset()
+        _flights.forget('records', None)
+        _bump_food_catalog_version()
+        return not missing
+
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error deleting food from sheet: {str(e)}")
         return False
 
 
+# Normalized food name -> row of the food sheet
+_food_rows = FoodNameIndex()
+
+
 def get_all_foods():
     """Get all foods from the sheet as a pandas DataFrame."""
     try:
         sheet = get_sheet()
-        # Get headers first to validate structure
-        headers = sheet.row_values(1)
+        # Validate structure against the cached header row
+        headers = _registry.headers()
         if not headers:
             return pd.DataFrame()
 
-        data = sheet.get_all_records()
+        data = _flights.do(('records', None), sheet.get_all_records)
         if not data:
             return pd.DataFrame(columns=headers)
 
         return pd.DataFrame(data)
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error loading foods from sheet: {str(e)}")
         return pd.DataFrame()
 
 
+def get_meta_sheet():
+    """Get the sheet of app metadata such as the food catalog version."""
+    try:
+        # Two rows so the version row lies inside the grid from the start
+        return _registry.worksheet(META_SHEET, CATALOG_VERSION_ROW,
+                                   len(META_HEADERS), META_HEADERS)
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        raise
+
+
+def _bump_food_catalog_version():
+    """Store a new food catalog version; call it after changing foods."""
+    try:
+        version = uuid.uuid4().hex
+        get_meta_sheet().batch_update([{
+            'range': 'A{0}:B{0}'.format(CATALOG_VERSION_ROW),
+            'values': [[CATALOG_VERSION_KEY, version]]
+        }])
+        _flights.forget('version')
+        return version
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        return None
+
+
+def get_food_catalog_version():
+    """Return a cheap version marker for the food sheet, or None.
+
+    The version lives in the Meta sheet and is replaced by add_food and
+    delete_food, so unlike the spreadsheet's modifiedTime it does not
+    change with log, user or recipe writes. Edits made directly in the
+    sheet do not replace it; the catalog picks those up by reloading once
+    it is older than FOOD_CATALOG_MAX_AGE (or right away if the cell is
+    cleared).
+    """
+    try:
+        sheet = get_meta_sheet()
+        row = _flights.do(('version', ),
+                          lambda: sheet.row_values(CATALOG_VERSION_ROW))
+        if len(row) > 1 and row[1]:
+            return row[1]
+        return _bump_food_catalog_version()
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        return None
+
+
 def add_food(food_data):
     """Add a new food item to the sheet."""
     try:
         sheet = get_sheet()
-        # Get the column headers from the sheet
-        headers = sheet.row_values(1)
+        # Get the cached column headers of the sheet
+        headers = _registry.headers()
         if not headers:
             st.error("Sheet headers not found")
             raise ValueError("Sheet headers not found")
 
-        # Check if food already exists
-        existing_foods = sheet.col_values(1)[
-            1:]  # Get all food names except header
-        if food_data['Food Name'].strip().lower() in [
-                f.strip().lower() for f in existing_foods
-        ]:
+        # Check if food already exists, reading the name column only once
+        if not _food_rows.loaded:
+            name_col = headers.index(
+                'Food Name') + 1 if 'Food Name' in headers else 1
+            _food_rows.rebuild(sheet.col_values(name_col)[1:], start=2)
+        if _food_rows.contains(food_data['Food Name']):
             raise ValueError(
                 f"Food item '{food_data['Food Name']}' already exists")
 
@@ -307,10 +720,14 @@ def add_food(food_data):
 
             row.append(value if value is not None else '')
 
-        sheet.append_row(row)
+        response = sheet.append_row(row)
+        _food_rows.add(food_data['Food Name'], _appended_row(response))
+        _flights.forget('records', None)
+        _bump_food_catalog_version()
         return True
 
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error adding food to sheet: {str(e)}")
         raise
 
@@ -318,62 +735,275 @@ def add_food(food_data):
 def get_daily_log_sheet():
     """Get the daily log sheet."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open("DB's Food Database")
-
-        # Get all worksheets
-        worksheets = spreadsheet.worksheets()
-        log_sheet = None
-
-        # Look for existing Daily Logs sheet
-        for worksheet in worksheets:
-            if worksheet.title == 'Daily Logs':
-                log_sheet = worksheet
-                break
-
-        # If Daily Logs sheet doesn't exist, create it with headers
-        if not log_sheet:
-            log_sheet = spreadsheet.add_worksheet('Daily Logs', 1, 11)
-            headers = [
-                'Mobile', 'Timestamp', 'Meal Type', 'Weight', 'Basis',
-                'Food Name', 'Category', 'Calories', 'Protein', 'Carbs', 'Fat'
-            ]
-            log_sheet.append_row(headers)
-
-        return log_sheet
+        # Daily Logs sheet is created with its headers if it doesn't exist
+        return _registry.worksheet(DAILY_LOGS_SHEET, 1, len(LOG_HEADERS),
+                                   LOG_HEADERS)
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error getting daily log sheet: {str(e)}")
         raise
 
 
-def save_meal_log(meal_data):
-    """Save meal log to the sheet."""
-    try:
-        sheet = get_daily_log_sheet()
+# Meal logs are queued and written behind the UI unless disabled
+WRITE_BEHIND = os.getenv('MEAL_LOG_WRITE_BEHIND', '1') != '0'
 
-        ist_time = datetime.now(ist_tz)  # Get current time in IST
+_meal_log_writer = None
+_meal_log_writer_lock = threading.Lock()
 
-        row_data = [
-            meal_data['mobile'],
-            ist_time.isoformat(),  # Use the IST timestamp
-            meal_data['meal_type'],
-            meal_data['weight'],
-            meal_data['basis'],
-            meal_data['food_name'],
-            meal_data['category'],
-            meal_data['calories'],
-            meal_data['protein'],
-            meal_data['carbs'],
-            meal_data['fat']
-        ]
 
-        sheet.append_row(row_data)
+def get_meal_log_writer():
+    """Return the process-wide meal log writer, or None if disabled."""
+    global _meal_log_writer
+    if not WRITE_BEHIND:
+        return None
+    with _meal_log_writer_lock:
+        if _meal_log_writer is None:
+            _meal_log_writer = MealLogWriter(get_daily_log_sheet)
+            # Flush anything left over from a previous run
+            _meal_log_writer.start()
+        return _meal_log_writer
+
+
+def save_meal_logs(meals):
+    """Save several meal log entries to the sheet in one append.
+
+    With write-behind enabled the rows are queued locally and appended by
+    the background writer; get_daily_logs already includes them. An IST
+    'timestamp' in an entry is used instead of the current time.
+    """
+    try:
+        now = datetime.now(ist_tz)  # Get current time in IST
+        entries = []
+        for offset, meal_data in enumerate(meals):
+            # Timestamps tell queued rows apart, so keep them distinct
+            ist_time = meal_data.get('timestamp') or now + timedelta(
+                microseconds=offset)
+            entries.append((meal_data['mobile'],
+                            ist_time.date().isoformat(),
+                            log_row(meal_data, ist_time)))
+        if not entries:
+            return True
+
+        writer = get_meal_log_writer()
+        if writer is not None:
+            writer.enqueue_many(entries)
+        else:
+            get_daily_log_sheet().append_rows([row for _, _, row in entries])
+            _flights.forget('logs')
         return True
     except Exception as e:
+        _registry.invalidate_if_missing(e)
         st.error(f"Error saving meal log: {str(e)}")
         return False
 
 
+def save_meal_log(meal_data):
+    """Save one meal log entry to the sheet (see save_meal_logs)."""
+    return save_meal_logs([meal_data])
+
+
+def _with_pending_logs(records, mobile):
+    """Add queued rows for mobile that are not yet in the sheet records."""
+    writer = get_meal_log_writer()
+    if writer is None:
+        return records
+    # records may be shared with other callers, so build a new list
+    seen = {str(r.get('Timestamp')) for r in records}
+    pending = [dict(zip(LOG_HEADERS, row)) for row in writer.pending(mobile)]
+    return records + [r for r in pending if r['Timestamp'] not in seen]
+
+
+def _log_record(headers, values):
+    """Build a get_all_records() style dict from raw Daily Logs values."""
+    values = list(values) + [''] * (len(headers) - len(values))
+    return dict(zip(headers, numericise_all(values[:len(headers)])))
+
+
+def _log_key(record):
+    """Return the (mobile, 'dd-mm-YYYY') index key of a log record."""
+    mobile = str(record.get('Mobile', '')).strip()
+    try:
+        dt = datetime.fromisoformat(str(record.get('Timestamp', '')))
+    except ValueError:
+        return None
+    if not mobile:
+        return None
+    return mobile, dt.astimezone(ist_tz).strftime('%d-%m-%Y')
+
+
+def _add_totals(summaries, date, record):
+    """Add a log record's macros to the totals for date."""
+    totals = summaries.setdefault(date,
+                                  {field: 0 for field in SUMMARY_FIELDS})
+    for field, column in SUMMARY_FIELDS.items():
+        value = record.get(column, 0)
+        totals[field] += value if isinstance(value, (int, float)) else 0
+
+
+class DailySummaryRollup:
+    """Per-user, per-date macro totals of the indexed Daily Logs rows.
+
+    The log index feeds every row it indexes into the rollup, so the
+    totals always cover exactly the rows it has seen and summary reads
+    cost O(days) instead of a pass over the user's whole history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def add(self, key, record):
+        mobile, date = key
+        with self._lock:
+            _add_totals(self._totals.setdefault(mobile, {}), date, record)
+
+    def discard(self, mobile, start_date, end_date):
+        """Drop a user's totals for dates in [start_date, end_date]."""
+        with self._lock:
+            dates = self._totals.get(str(mobile).strip(), {})
+            for date in list(dates):
+                day = datetime.strptime(date, '%d-%m-%Y').date()
+                if start_date <= day <= end_date:
+                    del dates[date]
+
+    def get(self, mobile):
+        """Return a copy of a user's {date: totals} mapping."""
+        with self._lock:
+            dates = self._totals.get(str(mobile).strip(), {})
+            return {date: dict(totals) for date, totals in dates.items()}
+
+    def reset(self):
+        with self._lock:
+            self._totals = {}
+
+
+# Runs of a user's rows at most this many rows apart are read as one range
+LOG_RANGE_GAP = 50
+
+# Ranges per batch_get; they all go in the request URL, which is limited
+MAX_RANGES_PER_GET = 100
+
+
+class DailyLogIndex:
+    """Index of the Daily Logs sheet from (mobile, date) to row numbers.
+
+    A high-water mark tracks the rows already indexed, so each read
+    fetches only the rows appended since the previous read plus the
+    rows it needs. Nearby runs of rows are merged into one range and the
+    ranges are sent in batch_get requests of bounded URL length. Rows
+    that no longer match their key (the sheet was edited elsewhere)
+    trigger a rebuild.
+    """
+
+    def __init__(self, rollup=None):
+        self._lock = threading.Lock()
+        self._rollup = rollup
+        self._high_water = 1  # Last indexed row; row 1 holds the headers
+        self._rows = {}
+
+    def _clear(self):
+        self._high_water = 1
+        self._rows = {}
+        if self._rollup is not None:
+            self._rollup.reset()
+
+    def reset(self):
+        """Forget everything so the next read rebuilds the index."""
+        with self._lock:
+            self._clear()
+
+    def remove_rows(self, rows):
+        """Account for deleted 1-based rows without rebuilding."""
+        deleted_set = set(rows)
+        deleted = sorted(deleted_set)
+        if not deleted:
+            return
+        with self._lock:
+            for key, numbers in list(self._rows.items()):
+                kept = [
+                    n - bisect.bisect_left(deleted, n) for n in numbers
+                    if n not in deleted_set
+                ]
+                if kept:
+                    self._rows[key] = kept
+                else:
+                    del self._rows[key]
+            self._high_water -= bisect.bisect_right(deleted,
+                                                    self._high_water)
+
+    def _matches(self, key, mobile, date):
+        return key is not None and key[0] == mobile and (not date
+                                                         or key[1] == date)
+
+    def _targets(self, mobile, date):
+        rows = []
+        for key, numbers in self._rows.items():
+            if self._matches(key, mobile, date):
+                rows.extend(numbers)
+        return rows
+
+    def _read(self, sheet, headers, mobile, date):
+        last_col = rowcol_to_a1(1, len(headers))[:-1]
+        targets = set(self._targets(mobile, date))
+        known = _merge_ranges(_row_ranges(targets), LOG_RANGE_GAP)
+        # Start at the last indexed row, which always lies inside the grid
+        ranges = ['A{0}:{1}'.format(self._high_water, last_col)]
+        ranges += ['A{0}:{1}{2}'.format(start, last_col, end)
+                   for start, end in known]
+        # batch_get puts every range in the URL, so bound each request
+        results = []
+        for i in range(0, len(ranges), MAX_RANGES_PER_GET):
+            results += sheet.batch_get(ranges[i:i + MAX_RANGES_PER_GET])
+
+        records = []
+        for (start, end), values in zip(known, results[1:]):
+            if len(values) != end - start + 1:
+                return None
+            for row, row_values in enumerate(values, start=start):
+                # Merged ranges also span other users' rows
+                if row not in targets:
+                    continue
+                record = _log_record(headers, row_values)
+                if not self._matches(_log_key(record), mobile, date):
+                    return None
+                records.append(record)
+
+        new_rows = results[0][1:] if results else []
+        for offset, row_values in enumerate(new_rows):
+            record = _log_record(headers, row_values)
+            key = _log_key(record)
+            if key is None:
+                continue
+            self._rows.setdefault(key, []).append(self._high_water + 1 +
+                                                  offset)
+            if self._rollup is not None:
+                self._rollup.add(key, record)
+            if self._matches(key, mobile, date):
+                records.append(record)
+        self._high_water += len(new_rows)
+        return records
+
+    def read(self, sheet, headers, mobile, date=None):
+        """Return the records for mobile, optionally for one date."""
+        mobile = str(mobile).strip()
+        with self._lock:
+            records = self._read(sheet, headers, mobile, date)
+            if records is None:
+                # Rows moved underneath us: rebuild from a full read
+                self._clear()
+                records = self._read(sheet, headers, mobile, date)
+            return records
+
+    def sync(self, sheet, headers):
+        """Index the rows appended since the last read."""
+        with self._lock:
+            self._read(sheet, headers, None, None)
+
+
+_summaries = DailySummaryRollup()
+_log_index = DailyLogIndex(_summaries)
+
+
 # def get_daily_logs(mobile, date=None):
 #     """Get daily logs for a specific mobile number and optional date."""
 #     try:
@@ -400,87 +1030,231 @@ def save_meal_log(meal_data):
 #         return []
 
 
-def get_daily_logs(mobile, date=None):
-    """Get daily logs for a specific mobile number and optional date."""
+def get_daily_logs_frame(mobile, date=None):
+    """Get a user's logs as a DataFrame, optionally for one date."""
     try:
         sheet = get_daily_log_sheet()
-        records = sheet.get_all_records()
-
-        # Filter by mobile
-        logs = [r for r in records if str(r['Mobile']) == str(mobile)]
-
-        # Convert and format timestamps
-        for log in logs:
-            dt = datetime.fromisoformat(log['Timestamp']).astimezone(
-                pytz.timezone('Asia/Kolkata'))
-            log['Date'] = dt.strftime('%d-%m-%Y')
-            log['Time'] = dt.strftime(
-                '%I:%M %p')  # Change here for AM/PM format
-            log['Timestamp'] = dt
-        # Filter by date if provided
-        if date:
-            logs = [r for r in logs if r['Date'] == date]
-        return sorted(logs, key=lambda x: x['Timestamp'])
+        headers = _registry.headers(DAILY_LOGS_SHEET)
+
+        # Read only this user's rows (and any new ones) via the row index;
+        # concurrent reruns for the same user and date share one read
+        logs = _flights.do(
+            ('logs', str(mobile).strip(), date),
+            lambda: _log_index.read(sheet, headers, mobile, date))
+        logs = _with_pending_logs(logs, mobile)
+        return logs_frame(logs, date)
     except Exception as e:
+        if _registry.invalidate_if_missing(e):
+            _log_index.reset()
         st.error(f"Error getting daily logs: {str(e)}")
-        return []
+        return logs_frame([])
+
+
+def get_daily_logs(mobile, date=None):
+    """Get daily logs for a specific mobile number and optional date."""
+    return get_daily_logs_frame(mobile, date).to_dict('records')
 
 
 def delete_logs_by_date_range(mobile, start_date, end_date):
     """Delete all logs for a specific mobile number within a date range."""
     try:
-        sheet = get_daily_log_sheet()
-        records = sheet.get_all_records()
-        all_values = sheet.get_all_values()
-        headers = all_values[0]
-
         # Convert date inputs to string format
         start_date_str = start_date.strftime('%Y-%m-%d')
         end_date_str = end_date.strftime('%Y-%m-%d')
 
+        # Drop queued rows first so none are flushed after the sheet read
+        writer = get_meal_log_writer()
+        if writer is not None:
+            writer.discard(mobile, start_date_str, end_date_str)
+
+        sheet = get_daily_log_sheet()
+        all_values = sheet.get_all_values()
+        if not all_values:
+            return True
+        headers = all_values[0]
+        mobile_col = headers.index('Mobile')
+        timestamp_col = headers.index('Timestamp')
+
         # Find rows to delete
         rows_to_delete = []
-        for idx, record in enumerate(
-                records, start=2):  # Start from 2 to account for headers
-            log_date = record['Timestamp'].split('T')[
+        for idx, row in enumerate(
+                all_values[1:], start=2):  # Start from 2 to account for headers
+            if len(row) <= max(mobile_col, timestamp_col):
+                continue
+            log_date = row[timestamp_col].split('T')[
                 0]  # Date in 'YYYY-MM-DD' format
-            if (str(record['Mobile']) == str(mobile)
+            if (row[mobile_col].strip() == str(mobile).strip()
                     and start_date_str <= log_date <= end_date_str):
                 rows_to_delete.append(idx)
 
-        # Delete rows in reverse order to maintain correct indices
-        for row in sorted(rows_to_delete, reverse=True):
-            sheet.delete_rows(row)
+        # Remove all matching ranges in one request
+        delete_row_ranges(sheet, rows_to_delete)
+        _log_index.remove_rows(rows_to_delete)
+        _summaries.discard(mobile, start_date, end_date)
+        _flights.forget('logs')
 
         return True
     except Exception as e:
+        # The index may not match the sheet after a failed delete
+        _registry.invalidate_if_missing(e)
+        _log_index.reset()
         st.error(f"Error deleting logs: {str(e)}")
         return False
 
 
 def get_daily_summaries(mobile):
-    """Get daily summaries of calorie intake."""
+    """Get daily summaries of calorie intake.
+
+    Totals come from the rollup maintained by the log index, so only rows
+    appended since the last read are fetched.
+    """
     try:
-        logs = get_daily_logs(mobile)
-        summaries = {}
-
-        for log in logs:
-            date = log[
-                'Date']  # Using the already formatted date from get_daily_logs
-            if date not in summaries:
-                summaries[date] = {
-                    'total_calories': 0,
-                    'total_protein': 0,
-                    'total_carbs': 0,
-                    'total_fat': 0
-                }
-
-            summaries[date]['total_calories'] += log['Calories']
-            summaries[date]['total_protein'] += log['Protein']
-            summaries[date]['total_carbs'] += log['Carbs']
-            summaries[date]['total_fat'] += log['Fat']
+        sheet = get_daily_log_sheet()
+        headers = _registry.headers(DAILY_LOGS_SHEET)
+        _flights.do(('logs', ), lambda: _log_index.sync(sheet, headers))
+        summaries = _summaries.get(mobile)
+
+        # Queued rows are not in the sheet (or the rollup) yet
+        writer = get_meal_log_writer()
+        pending = writer.pending(mobile) if writer is not None else []
+        if pending:
+            records = [dict(zip(LOG_HEADERS, row)) for row in pending]
+            for pending_totals in summarize_logs(
+                    logs_frame(records)).to_dict('records'):
+                date = pending_totals.pop('date')
+                totals = summaries.setdefault(
+                    date, {field: 0 for field in SUMMARY_FIELDS})
+                for field, value in pending_totals.items():
+                    totals[field] += value
 
         return [{'date': k, **v} for k, v in summaries.items()]
     except Exception as e:
+        if _registry.invalidate_if_missing(e):
+            _log_index.reset()
         st.error(f"Error getting daily summaries: {str(e)}")
         return []
+
+
+def get_recipe_sheet():
+    """Get the recipes sheet."""
+    try:
+        # Recipes sheet is created with its headers if it doesn't exist
+        return _registry.worksheet(RECIPES_SHEET, 1, len(RECIPE_HEADERS),
+                                   RECIPE_HEADERS)
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        st.error(f"Error getting recipes sheet: {str(e)}")
+        raise
+
+
+def _number(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _recipe_row(recipe):
+    """Return the Recipes sheet cells of a recipe dict."""
+    return [
+        str(recipe['mobile']).strip(), recipe['name'],
+        json.dumps(recipe['components']), recipe['servings'],
+        recipe['calories'], recipe['protein'], recipe['carbs'], recipe['fat'],
+        recipe.get('fingerprint') or '',
+        datetime.now(ist_tz).isoformat()
+    ]
+
+
+def _recipe_from_row(row):
+    """Build a recipe dict from Recipes sheet values, or None if invalid."""
+    row = list(row) + [''] * (len(RECIPE_HEADERS) - len(row))
+    try:
+        components = json.loads(row[2] or '[]')
+    except ValueError:
+        return None
+    return {
+        'mobile': row[0].strip(),
+        'name': row[1],
+        'components': components,
+        'servings': _number(row[3], 1.0),
+        'calories': _number(row[4]),
+        'protein': _number(row[5]),
+        'carbs': _number(row[6]),
+        'fat': _number(row[7]),
+        'fingerprint': row[8] or None
+    }
+
+
+def _recipe_rows(rows):
+    """Map (mobile, recipe name) to 1-based row numbers."""
+    return {(row[0].strip(), row[1]): number
+            for number, row in enumerate(rows[1:], start=2) if len(row) > 1}
+
+
+def get_recipes(mobile):
+    """Get a user's saved recipes."""
+    try:
+        sheet = get_recipe_sheet()
+        rows = _flights.do(('recipes', ), sheet.get_all_values)
+        mobile = str(mobile).strip()
+        recipes = [
+            _recipe_from_row(row) for row in rows[1:]
+            if row and row[0].strip() == mobile
+        ]
+        return [recipe for recipe in recipes if recipe is not None]
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        st.error(f"Error getting recipes: {str(e)}")
+        return []
+
+
+def save_recipes(recipes):
+    """Create or update recipes, matched by mobile number and name.
+
+    Existing rows are rewritten with one batch_update and new recipes
+    added with one append_rows.
+    """
+    try:
+        sheet = get_recipe_sheet()
+        existing = _recipe_rows(sheet.get_all_values())
+        last_col = rowcol_to_a1(1, len(RECIPE_HEADERS))[:-1]
+
+        updates = []
+        appends = {}
+        for recipe in recipes:
+            row = _recipe_row(recipe)
+            number = existing.get((row[0], row[1]))
+            if number:
+                updates.append({
+                    'range': f'A{number}:{last_col}{number}',
+                    'values': [row]
+                })
+            else:
+                appends[(row[0], row[1])] = row
+
+        if updates:
+            sheet.batch_update(updates)
+        if appends:
+            sheet.append_rows(list(appends.values()))
+        _flights.forget('recipes')
+        return True
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        st.error(f"Error saving recipes: {str(e)}")
+        return False
+
+
+def delete_recipe(mobile, name):
+    """Delete a user's recipe."""
+    try:
+        sheet = get_recipe_sheet()
+        number = _recipe_rows(sheet.get_all_values()).get(
+            (str(mobile).strip(), name))
+        if number:
+            delete_row_ranges(sheet, [number])
+        _flights.forget('recipes')
+        return True
+    except Exception as e:
+        _registry.invalidate_if_missing(e)
+        st.error(f"Error deleting recipe: {str(e)}")
+        return False
@@ -0,0 +1,167 @@
+"""Client-side rate limiting and retries for Google Sheets API calls.
+
+All Sheets requests run through the process-wide QuotaLimiter. It keeps a
+token bucket per quota (reads and writes), sized to the per-minute quota
+of the service account, so bursts are smoothed out instead of being
+rejected by Google. Calls made from a Streamlit session (user-facing)
+go ahead of background work such as the meal log writer and catalog
+refresh: while interactive calls are waiting, background calls do not
+take tokens, and background calls always leave a reserve of tokens
+unused.
+
+Requests that still fail with a 429 (or, for reads, a transient server
+error) are retried with jittered exponential backoff, and a 429 drains
+the bucket so every caller slows down together.
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from gspread.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute allowed for the service account (Google's default
+# per-user quota); lower them when several processes share the account
+READ_QUOTA = int(os.getenv('SHEETS_READ_QUOTA', '60'))
+WRITE_QUOTA = int(os.getenv('SHEETS_WRITE_QUOTA', '60'))
+
+# Share of the bucket that background calls leave for interactive ones
+BACKGROUND_RESERVE = 0.2
+
+# Longest an interactive call waits for a token before going ahead anyway
+MAX_INTERACTIVE_WAIT = 20.0
+
+MAX_RETRIES = int(os.getenv('SHEETS_MAX_RETRIES', '5'))
+BACKOFF_BASE = 1.0
+MAX_BACKOFF = 32.0
+
+# Server errors worth retrying for reads (writes might be applied twice)
+TRANSIENT_CODES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity tokens per period.
+
+    Waiting callers are served in two lanes: interactive callers take
+    tokens first, background callers only when no interactive caller is
+    waiting and more than the reserve is left.
+    """
+
+    def __init__(self, capacity, period=60.0, reserve=BACKGROUND_RESERVE):
+        self.capacity = max(1, capacity)
+        self.rate = self.capacity / period
+        self.reserve = self.capacity * reserve
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _available(self, interactive):
+        if interactive:
+            return self._tokens >= 1
+        return not self._interactive_waiting and \
+            self._tokens >= 1 + self.reserve
+
+    def acquire(self, interactive=True, timeout=None):
+        """Take a token, waiting for one; return False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if interactive:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    if self._available(interactive):
+                        self._tokens -= 1
+                        return True
+                    needed = (1 if interactive else 1 + self.reserve) - \
+                        self._tokens
+                    wait = max(needed / self.rate, 0.01)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                if interactive:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reported a quota error."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def available(self):
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+
+def _retryable(error, kind):
+    if isinstance(error, APIError):
+        return error.code == 429 or (kind != 'write'
+                                     and error.code in TRANSIENT_CODES)
+    # Connection problems: a write may have reached the server
+    return kind != 'write' and isinstance(
+        error, (requests.ConnectionError, requests.Timeout))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=MAX_BACKOFF):
+    """Return a 'full jitter' exponential backoff delay for attempt."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class QuotaLimiter:
+    """Runs Sheets API calls within the read and write quotas."""
+
+    def __init__(self, read_quota=READ_QUOTA, write_quota=WRITE_QUOTA,
+                 max_retries=MAX_RETRIES):
+        self.buckets = {
+            'read': TokenBucket(read_quota),
+            'write': TokenBucket(write_quota)
+        }
+        self.max_retries = max_retries
+
+    def call(self, kind, fn, interactive=True):
+        """Call fn() under the quota for kind ('read', 'write', 'drive').
+
+        Drive requests have their own, much larger quota and are only
+        retried, not limited.
+        """
+        bucket = self.buckets.get(kind)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                timeout = MAX_INTERACTIVE_WAIT if interactive else None
+                if not bucket.acquire(interactive, timeout):
+                    logger.warning(
+                        'Sheets %s quota exhausted, calling anyway', kind)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not _retryable(e, kind):
+                    raise
+                if bucket is not None and isinstance(e, APIError) and \
+                        e.code == 429:
+                    bucket.drain()
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logger.info('Retrying Sheets %s in %.1fs (attempt %d): %s',
+                            kind, delay, attempt, e)
+                time.sleep(delay)
+
+
+limiter = QuotaLimiter()
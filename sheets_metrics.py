@@ -0,0 +1,415 @@
+"""Instrumentation of the Google Sheets API calls made by sheets_db.
+
+get_sheets_client() hands out clients wrapped by instrument(), so every
+call on the client and on the spreadsheets and worksheets it returns is
+recorded with the sheets_db function that made it, its operation and
+quota kind (read, write or Drive), latency, rows read or written and
+whether it failed on a quota (429) error. Calls go through the quota
+limiter (sheets_limiter), and every retry is recorded as its own call.
+
+Pages call begin_rerun() at the top of each script run, which closes the
+session's previous rerun and logs its call counts. The collected data
+is shown on the Sheets API Usage page and can be exported as JSON
+(snapshot) or in the Prometheus text format (prometheus_text).
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import gspread
+
+from fake_sheets import FakeSpreadsheet, FakeWorksheet
+from sheets_limiter import limiter
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+WRITE_OPERATIONS = {
+    'add_worksheet', 'append_row', 'append_rows', 'batch_clear',
+    'batch_update', 'clear', 'del_worksheet', 'delete_rows', 'insert_row',
+    'insert_rows', 'update', 'update_cell', 'update_cells',
+    'spreadsheet.batch_update'
+}
+DRIVE_OPERATIONS = {'get_lastUpdateTime', 'list_spreadsheet_files'}
+
+# Seconds after which an idle session's open rerun is dropped
+SESSION_TIMEOUT = 3600
+
+# Attributes that are resolved with an API request
+API_PROPERTIES = {'sheet1'}
+
+_WRAPPED_TYPES = (gspread.Spreadsheet, gspread.Worksheet, FakeSpreadsheet,
+                  FakeWorksheet)
+
+
+def operation_kind(operation):
+    if operation in DRIVE_OPERATIONS:
+        return 'drive'
+    return 'write' if operation in WRITE_OPERATIONS else 'read'
+
+
+def _payload_rows(operation, args, kwargs, result):
+    """Return the number of rows an API call read or wrote."""
+    try:
+        if operation == 'append_row' or operation == 'update_cell':
+            return 1
+        if operation == 'append_rows':
+            return len(args[0] if args else kwargs['values'])
+        if operation == 'batch_update':
+            data = args[0] if args else kwargs['data']
+            return sum(len(item['values']) for item in data)
+        if operation == 'delete_rows':
+            end = args[1] if len(args) > 1 else kwargs.get('end_index')
+            return (end or args[0]) - args[0] + 1
+        if operation == 'spreadsheet.batch_update':
+            body = args[0] if args else kwargs['body']
+            return sum(
+                r['deleteDimension']['range']['endIndex'] -
+                r['deleteDimension']['range']['startIndex']
+                for r in body.get('requests', []) if 'deleteDimension' in r)
+        if operation == 'batch_get':
+            return sum(len(values) for values in result)
+        if operation == 'row_values':
+            return 1
+        if operation in ('get_all_records', 'get_all_values', 'col_values'):
+            return len(result)
+    except Exception:
+        pass
+    return 0
+
+
+# Code of helpers that only forward calls, such as request coalescing;
+# lambdas are skipped too, so reads they defer count for their creator
+_PASS_THROUGH = set()
+
+
+def pass_through(fn):
+    """Decorator: attribute API calls made via fn to fn's caller."""
+    _PASS_THROUGH.add(fn.__code__)
+    return fn
+
+
+def _caller():
+    """Return the qualified name of the function that made the API call."""
+    frame = sys._getframe(1)
+    while frame is not None and (
+            frame.f_globals.get('__name__') == __name__
+            or frame.f_code in _PASS_THROUGH
+            or frame.f_code.co_name == '<lambda>'):
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}.{frame.f_code.co_qualname}"
+
+
+def _session_id():
+    """Return the Streamlit session running this thread, if any."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+class _Stats:
+    """Aggregates for one (caller, operation) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.quota_errors = 0
+        self.rows = 0
+        self.total_latency = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, latency, rows, error, quota_error):
+        self.calls += 1
+        self.errors += error
+        self.quota_errors += quota_error
+        self.rows += rows
+        self.total_latency += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, q):
+        """Estimate a latency percentile from the histogram buckets."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'), ),
+                                self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+def _ms(seconds):
+    """Return seconds in milliseconds, or None past the last bucket."""
+    return None if seconds == float('inf') else seconds * 1000
+
+
+class SheetsMetrics:
+    """Thread-safe, process-wide recorder of Sheets API calls."""
+
+    def __init__(self, window=60.0, history=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._recent = {'read': deque(), 'write': deque(), 'drive': deque()}
+        self._reruns = {}
+        self._history = deque(maxlen=history)
+        self.started = time.time()
+
+    def record(self, caller, operation, latency, rows=0, error=None):
+        quota_error = isinstance(error, gspread.exceptions.APIError) and \
+            error.code == 429
+        kind = operation_kind(operation)
+        session = _session_id()
+        now = time.time()
+        with self._lock:
+            stats = self._stats.get((caller, operation))
+            if stats is None:
+                stats = self._stats[(caller, operation)] = _Stats()
+            stats.add(latency, rows, error is not None, quota_error)
+            recent = self._recent[kind]
+            recent.append(now)
+            while recent and now - recent[0] > self.window:
+                recent.popleft()
+            rerun = self._reruns.get(session)
+            if rerun is not None:
+                rerun['calls'][operation] += 1
+                rerun['quota_errors'] += quota_error
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        logger.debug(
+            json.dumps({
+                'event': 'sheets_call',
+                'caller': caller,
+                'operation': operation,
+                'kind': kind,
+                'latency_ms': round(latency * 1000, 1),
+                'rows': rows,
+                'error': type(error).__name__ if error else None,
+                'quota_error': quota_error,
+                'session': session
+            }))
+
+    def begin_rerun(self, page):
+        """Start counting the calls of the current session's rerun."""
+        session = _session_id()
+        if session is None:
+            return
+        now = time.time()
+        with self._lock:
+            # Forget sessions that have not rerun for a while
+            for stale in [
+                    key for key, rerun in self._reruns.items()
+                    if now - rerun['started'] > SESSION_TIMEOUT
+            ]:
+                del self._reruns[stale]
+            finished = self._reruns.get(session)
+            self._reruns[session] = {
+                'session': session,
+                'page': page,
+                'started': now,
+                'calls': Counter(),
+                'quota_errors': 0
+            }
+            if finished is None:
+                return
+            finished = self._rerun_record(finished)
+            self._history.append(finished)
+        logger.info(json.dumps({'event': 'sheets_rerun', **finished}))
+
+    @staticmethod
+    def _rerun_record(rerun):
+        return {
+            'session': rerun['session'],
+            'page': rerun['page'],
+            'started': rerun['started'],
+            'total_calls': sum(rerun['calls'].values()),
+            'quota_errors': rerun['quota_errors'],
+            'calls': dict(rerun['calls'])
+        }
+
+    def rerun_calls(self):
+        """Return the call counts of the current session's rerun so far."""
+        session = _session_id()
+        with self._lock:
+            rerun = self._reruns.get(session)
+            return dict(rerun['calls']) if rerun else {}
+
+    def calls_last_window(self):
+        """Return {kind: calls} over the last window seconds."""
+        now = time.time()
+        with self._lock:
+            return {
+                kind: sum(1 for t in recent if now - t <= self.window)
+                for kind, recent in self._recent.items()
+            }
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            calls = [{
+                'caller': caller,
+                'operation': operation,
+                'kind': operation_kind(operation),
+                'calls': stats.calls,
+                'errors': stats.errors,
+                'quota_errors': stats.quota_errors,
+                'rows': stats.rows,
+                'total_latency_s': round(stats.total_latency, 4),
+                'avg_latency_ms': round(
+                    stats.total_latency / stats.calls * 1000, 1),
+                'p95_latency_ms': _ms(stats.percentile(0.95)),
+                'latency_buckets': dict(
+                    zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'],
+                        stats.buckets))
+            } for (caller, operation), stats in self._stats.items()]
+            reruns = list(self._history) + [
+                self._rerun_record(rerun) for rerun in self._reruns.values()
+            ]
+        return {
+            'started': self.started,
+            'generated': time.time(),
+            'last_minute': self.calls_last_window(),
+            'calls': calls,
+            'reruns': reruns
+        }
+
+    def prometheus_text(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            '# TYPE sheets_api_calls_total counter',
+            '# TYPE sheets_api_errors_total counter',
+            '# TYPE sheets_api_quota_errors_total counter',
+            '# TYPE sheets_api_rows_total counter',
+            '# TYPE sheets_api_latency_seconds histogram'
+        ]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for (caller, operation), stats in items:
+                labels = (f'caller="{caller}",operation="{operation}",'
+                          f'kind="{operation_kind(operation)}"')
+                lines.append(f'sheets_api_calls_total{{{labels}}} {stats.calls}')
+                lines.append(
+                    f'sheets_api_errors_total{{{labels}}} {stats.errors}')
+                lines.append(f'sheets_api_quota_errors_total{{{labels}}} '
+                             f'{stats.quota_errors}')
+                lines.append(f'sheets_api_rows_total{{{labels}}} {stats.rows}')
+                cumulative = 0
+                for bound, count in zip(
+                        [str(b) for b in LATENCY_BUCKETS] + ['+Inf'],
+                        stats.buckets):
+                    cumulative += count
+                    lines.append(f'sheets_api_latency_seconds_bucket'
+                                 f'{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'sheets_api_latency_seconds_sum{{{labels}}} '
+                             f'{stats.total_latency:.6f}')
+                lines.append(f'sheets_api_latency_seconds_count{{{labels}}} '
+                             f'{stats.calls}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            for recent in self._recent.values():
+                recent.clear()
+            self._history.clear()
+            self.started = time.time()
+
+
+metrics = SheetsMetrics()
+
+
+def begin_rerun(page):
+    metrics.begin_rerun(page)
+
+
+def _wrap(value):
+    if isinstance(value, _WRAPPED_TYPES):
+        return Instrumented(value)
+    return value
+
+
+class Instrumented:
+    """Proxy that records every method call on a gspread object.
+
+    Spreadsheets and worksheets returned by a call (or attribute) are
+    wrapped in turn, so calls through them are recorded as well.
+    """
+
+    def __init__(self, target, prefix=''):
+        self._target = target
+        self._prefix = prefix or ('spreadsheet.' if isinstance(
+            target, (gspread.Spreadsheet, FakeSpreadsheet)) else '')
+
+    def __repr__(self):
+        return repr(self._target)
+
+    def __eq__(self, other):
+        if isinstance(other, Instrumented):
+            other = other._target
+        return self._target == other
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def _operation(self, name):
+        # Only batch_update exists on both spreadsheets and worksheets
+        return self._prefix + name if name == 'batch_update' else name
+
+    def __getattr__(self, name):
+        if name in API_PROPERTIES:
+            return _wrap(_run(name, lambda: getattr(self._target, name)))
+
+        value = getattr(self._target, name)
+        if name.startswith('_') or not callable(value):
+            return _wrap(value)
+
+        operation = self._operation(name)
+
+        def call(*args, **kwargs):
+            return _wrap(
+                _run(operation, lambda: value(*args, **kwargs), args, kwargs))
+
+        return call
+
+
+def _run(operation, fn, args=(), kwargs=None):
+    """Call fn() through the quota limiter, recording every attempt."""
+    caller = _caller()
+    kind = operation_kind(operation)
+
+    def attempt():
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            metrics.record(caller, operation, time.perf_counter() - start,
+                           error=e)
+            raise
+        metrics.record(caller, operation, time.perf_counter() - start,
+                       _payload_rows(operation, args, kwargs or {}, result))
+        return result
+
+    return limiter.call(kind, attempt, interactive=_session_id() is not None)
+
+
+def instrument(client):
+    """Wrap a gspread (or fake) client so its API calls are recorded."""
+    return Instrumented(client)
@@ -0,0 +1,359 @@
+"""SQLAlchemy storage backend (SQLite by default) built on models.py.
+
+Returns the same shapes as sheets_db so it can replace it transparently.
+"""
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytz
+import streamlit as st
+from sqlalchemy import func
+
+from cache_regions import UNCHANGED
+from models import (FOOD_CATALOG_VERSION, AppMeta, DailySummary, FoodItem,
+                    MealLog, Recipe, SessionLocal, User)
+from storage import StorageBackend
+
+ist_tz = pytz.timezone('Asia/Kolkata')  # Define the IST timezone
+
+# DataFrame column -> FoodItem attribute
+FOOD_COLUMNS = {
+    'Food Name': 'name',
+    'Calories': 'calories',
+    'Protein': 'protein',
+    'Fat': 'fat',
+    'Carbs': 'carbs',
+    'Weight': 'weight',
+    'Basis': 'basis',
+    'Category': 'category',
+    'Fibre': 'fibre',
+    'Avg Weight': 'avg_weight',
+    'Source': 'source'
+}
+
+# Attributes filled in when a food_data dict leaves them out
+FOOD_DEFAULTS = {'fat': 0, 'category': 'veg', 'basis': 'gm'}
+
+
+def _food_value(food_data, column, attr):
+    """Look a FoodItem field up in food_data under any of its key styles."""
+    for key in (column, column.lower(), column.replace(' ', '_').lower(),
+                attr):
+        if key in food_data:
+            return food_data[key]
+    return FOOD_DEFAULTS.get(attr)
+
+
+def _recipe_record(recipe):
+    """Convert a Recipe row to the dict shape used by sheets_db."""
+    return {
+        'mobile': recipe.mobile,
+        'name': recipe.name,
+        'components': json.loads(recipe.components or '[]'),
+        'servings': recipe.servings,
+        'calories': recipe.calories,
+        'protein': recipe.protein,
+        'carbs': recipe.carbs,
+        'fat': recipe.fat,
+        'fingerprint': recipe.fingerprint
+    }
+
+
+def _log_record(log):
+    """Convert a MealLog row to the dict shape used by sheets_db."""
+    dt = ist_tz.localize(log.timestamp)
+    return {
+        'Mobile': log.mobile,
+        'Timestamp': dt,
+        'Meal Type': log.meal_type,
+        'Weight': log.weight,
+        'Basis': log.basis,
+        'Food Name': log.food_name,
+        'Category': log.category,
+        'Calories': log.calories,
+        'Protein': log.protein,
+        'Carbs': log.carbs,
+        'Fat': log.fat,
+        'Date': dt.strftime('%d-%m-%Y'),
+        'Time': dt.strftime('%I:%M %p')
+    }
+
+
+class SQLBackend(StorageBackend):
+    """Storage on the SQLAlchemy database configured in models.py."""
+
+    def get_all_foods(self):
+        try:
+            with SessionLocal() as db:
+                foods = db.query(FoodItem).order_by(FoodItem.id).all()
+            return pd.DataFrame(
+                [{
+                    column: getattr(food, attr)
+                    for column, attr in FOOD_COLUMNS.items()
+                } for food in foods],
+                columns=list(FOOD_COLUMNS))
+        except Exception as e:
+            st.error(f"Error loading foods from database: {str(e)}")
+            return pd.DataFrame()
+
+    def get_food_catalog_version(self):
+        try:
+            # Bumped on every food insert, update or delete (see models.py)
+            with SessionLocal() as db:
+                meta = db.get(AppMeta, FOOD_CATALOG_VERSION)
+            return None if meta is None else str(meta.value)
+        except Exception:
+            return None
+
+    def add_food(self, food_data):
+        try:
+            name = food_data['Food Name'].strip()
+            with SessionLocal() as db:
+                exists = db.query(FoodItem.id).filter(
+                    func.lower(FoodItem.name) == name.lower()).first()
+                if exists:
+                    raise ValueError(
+                        f"Food item '{food_data['Food Name']}' already exists")
+
+                fields = {
+                    attr: _food_value(food_data, column, attr)
+                    for column, attr in FOOD_COLUMNS.items()
+                }
+                fields['name'] = name
+                db.add(FoodItem(**fields))
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error adding food to database: {str(e)}")
+            raise
+
+    def delete_food(self, food_names) -> bool:
+        if isinstance(food_names, str):
+            food_names = [food_names]
+        try:
+            targets = {name.strip().lower(): name for name in food_names}
+            with SessionLocal() as db:
+                foods = db.query(FoodItem).filter(
+                    func.lower(FoodItem.name).in_(list(targets))).all()
+                found = {food.name.lower() for food in foods}
+                for food in foods:
+                    db.delete(food)
+                db.commit()
+
+            missing = [
+                name for key, name in targets.items() if key not in found
+            ]
+            for name in missing:
+                st.error(f"Food item '{name}' not found in database")
+            return bool(found) and not missing
+        except Exception as e:
+            st.error(f"Error deleting food from database: {str(e)}")
+            return False
+
+    def load_user_info(self):
+        try:
+            mobile = st.session_state.get('mobile', None)
+            if not mobile:
+                return None
+
+            with SessionLocal() as db:
+                user = db.get(User, str(mobile).strip())
+            if user is None:
+                return None
+            return {
+                'full_name': user.full_name or 'iHacK',
+                'weight': float(user.weight or 70.0),
+                'calorie_mode': user.calorie_mode or 'maintenance',
+                'protein_per_kg': float(user.protein_per_kg or 2.0),
+                'fat_percent': float(user.fat_percent or 0.25)
+            }
+        except Exception as e:
+            st.error(f"Error loading user data: {str(e)}")
+            return None
+
+    def save_user_info(self, user_data):
+        try:
+            mobile = user_data.get('mobile') or st.session_state.get('mobile')
+            if not mobile:
+                raise ValueError("Mobile number is required")
+
+            fields = {
+                'full_name': user_data['full_name'],
+                'weight': user_data['weight'],
+                'calorie_mode': user_data['calorie_mode'],
+                'protein_per_kg': user_data['protein_per_kg'],
+                'fat_percent': user_data['fat_percent']
+            }
+            with SessionLocal() as db:
+                user = db.get(User, str(mobile).strip())
+                if user is None:
+                    user = User(mobile=str(mobile).strip())
+                    db.add(user)
+                elif all(getattr(user, k) == v for k, v in fields.items()):
+                    return UNCHANGED
+                for key, value in fields.items():
+                    setattr(user, key, value)
+                user.last_updated = datetime.now(ist_tz).replace(tzinfo=None)
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error saving user data: {str(e)}")
+            return False
+
+    def save_meal_log(self, meal_data) -> bool:
+        return self.save_meal_logs([meal_data])
+
+    def save_meal_logs(self, meals) -> bool:
+        try:
+            now = datetime.now(ist_tz)
+            logs = []
+            # Batch totals per (mobile, date), applied to the rollup once
+            totals = {}
+            for meal_data in meals:
+                ist_time = (meal_data.get('timestamp')
+                            or now).replace(tzinfo=None)
+                mobile = str(meal_data['mobile']).strip()
+                logs.append(
+                    MealLog(mobile=mobile,
+                            timestamp=ist_time,
+                            log_date=ist_time.date(),
+                            meal_type=meal_data['meal_type'],
+                            weight=meal_data['weight'],
+                            basis=meal_data['basis'],
+                            food_name=meal_data['food_name'],
+                            category=meal_data['category'],
+                            calories=meal_data['calories'],
+                            protein=meal_data['protein'],
+                            carbs=meal_data['carbs'],
+                            fat=meal_data['fat']))
+                day = totals.setdefault((mobile, ist_time.date()),
+                                        [0.0, 0.0, 0.0, 0.0])
+                day[0] += meal_data['calories']
+                day[1] += meal_data['protein']
+                day[2] += meal_data['carbs']
+                day[3] += meal_data['fat']
+
+            with SessionLocal() as db:
+                # Keep each day's rollup in step with the new entries
+                for (mobile, log_date), day in totals.items():
+                    summary = db.get(DailySummary, (mobile, log_date))
+                    if summary is None:
+                        summary = DailySummary(mobile=mobile,
+                                               log_date=log_date,
+                                               total_calories=0.0,
+                                               total_protein=0.0,
+                                               total_carbs=0.0,
+                                               total_fat=0.0)
+                        db.add(summary)
+                    summary.total_calories += day[0]
+                    summary.total_protein += day[1]
+                    summary.total_carbs += day[2]
+                    summary.total_fat += day[3]
+
+                db.add_all(logs)
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error saving meal log: {str(e)}")
+            return False
+
+    def get_daily_logs(self, mobile, date=None):
+        try:
+            with SessionLocal() as db:
+                query = db.query(MealLog).filter(
+                    MealLog.mobile == str(mobile).strip())
+                if date:
+                    log_date = datetime.strptime(date, '%d-%m-%Y').date()
+                    query = query.filter(MealLog.log_date == log_date)
+                logs = query.order_by(MealLog.timestamp).all()
+            return [_log_record(log) for log in logs]
+        except Exception as e:
+            st.error(f"Error getting daily logs: {str(e)}")
+            return []
+
+    def delete_logs_by_date_range(self, mobile, start_date, end_date) -> bool:
+        try:
+            with SessionLocal() as db:
+                db.query(MealLog).filter(
+                    MealLog.mobile == str(mobile).strip(),
+                    MealLog.log_date >= start_date,
+                    MealLog.log_date <= end_date).delete(
+                        synchronize_session=False)
+                db.query(DailySummary).filter(
+                    DailySummary.mobile == str(mobile).strip(),
+                    DailySummary.log_date >= start_date,
+                    DailySummary.log_date <= end_date).delete(
+                        synchronize_session=False)
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error deleting logs: {str(e)}")
+            return False
+
+    def get_daily_summaries(self, mobile):
+        try:
+            with SessionLocal() as db:
+                rows = db.query(DailySummary).filter(
+                    DailySummary.mobile == str(mobile).strip()).order_by(
+                        DailySummary.log_date).all()
+            return [{
+                'date': row.log_date.strftime('%d-%m-%Y'),
+                'total_calories': row.total_calories,
+                'total_protein': row.total_protein,
+                'total_carbs': row.total_carbs,
+                'total_fat': row.total_fat
+            } for row in rows]
+        except Exception as e:
+            st.error(f"Error getting daily summaries: {str(e)}")
+            return []
+
+    def get_recipes(self, mobile):
+        try:
+            with SessionLocal() as db:
+                rows = db.query(Recipe).filter(
+                    Recipe.mobile == str(mobile).strip()).order_by(
+                        Recipe.id).all()
+            return [_recipe_record(row) for row in rows]
+        except Exception as e:
+            st.error(f"Error getting recipes: {str(e)}")
+            return []
+
+    def save_recipes(self, recipes) -> bool:
+        try:
+            now = datetime.now(ist_tz).replace(tzinfo=None)
+            with SessionLocal() as db:
+                for recipe in recipes:
+                    mobile = str(recipe['mobile']).strip()
+                    row = db.query(Recipe).filter(
+                        Recipe.mobile == mobile,
+                        Recipe.name == recipe['name']).first()
+                    if row is None:
+                        row = Recipe(mobile=mobile, name=recipe['name'])
+                        db.add(row)
+                    row.components = json.dumps(recipe['components'])
+                    row.servings = recipe['servings']
+                    row.calories = recipe['calories']
+                    row.protein = recipe['protein']
+                    row.carbs = recipe['carbs']
+                    row.fat = recipe['fat']
+                    row.fingerprint = recipe.get('fingerprint')
+                    row.updated = now
+                    db.flush()
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error saving recipes: {str(e)}")
+            return False
+
+    def delete_recipe(self, mobile, name) -> bool:
+        try:
+            with SessionLocal() as db:
+                db.query(Recipe).filter(
+                    Recipe.mobile == str(mobile).strip(),
+                    Recipe.name == name).delete(synchronize_session=False)
+                db.commit()
+            return True
+        except Exception as e:
+            st.error(f"Error deleting recipe: {str(e)}")
+            return False
@@ -0,0 +1,407 @@
+"""Storage backend selection.
+
+The app talks to a StorageBackend that covers foods, users, meal logs
+and recipes. Google Sheets is the default; set STORAGE_BACKEND=sqlite to
+use the local SQLAlchemy database defined in models.py instead. The
+module-level functions mirror sheets_db, so callers only change their
+import; they also cache per-user reads in named regions that writes
+invalidate.
+
+Within a Streamlit session, a user's logs for today and daily summaries
+are read at most once per rerun into a UserLogContext.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import sheets_db
+from cache_regions import (FOOD_CATALOG, UNCHANGED, USER_LOGS,
+                           USER_PROFILE, USER_RECIPES, invalidate_region,
+                           region_version)
+from log_frames import (IST, LOG_HEADERS, SUMMARY_FIELDS, log_row,
+                        logs_frame, summarize_logs)
+
+# Backend used when STORAGE_BACKEND is not set
+DEFAULT_BACKEND = 'sheets'
+
+
+class StorageBackend(ABC):
+    """Repository interface for foods, users and meal logs."""
+
+    # Foods
+    @abstractmethod
+    def get_all_foods(self):
+        """Return all foods as a pandas DataFrame."""
+
+    def get_food_catalog_version(self):
+        """Return a cheap marker that changes with the catalog, or None."""
+        return None
+
+    @abstractmethod
+    def add_food(self, food_data):
+        """Add a food item; raise ValueError if it already exists."""
+
+    @abstractmethod
+    def delete_food(self, food_names) -> bool:
+        """Delete one food item, or a list of them."""
+
+    # Users
+    @abstractmethod
+    def load_user_info(self):
+        """Load the current session user's settings, or None."""
+
+    @abstractmethod
+    def save_user_info(self, user_data):
+        """Create or update a user's settings.
+
+        Return False on failure and UNCHANGED if nothing needed writing.
+        """
+
+    # Meal logs
+    @abstractmethod
+    def save_meal_log(self, meal_data) -> bool:
+        """Log a single food entry."""
+
+    @abstractmethod
+    def save_meal_logs(self, meals) -> bool:
+        """Log several food entries in one write."""
+
+    @abstractmethod
+    def get_daily_logs(self, mobile, date=None):
+        """Return a user's log records, optionally for one dd-mm-YYYY date."""
+
+    def get_daily_logs_frame(self, mobile, date=None):
+        """Return get_daily_logs() as a DataFrame (see log_frames)."""
+        return logs_frame(self.get_daily_logs(mobile, date), date)
+
+    @abstractmethod
+    def delete_logs_by_date_range(self, mobile, start_date, end_date) -> bool:
+        """Delete a user's logs between two dates (inclusive)."""
+
+    @abstractmethod
+    def get_daily_summaries(self, mobile):
+        """Return per-date calorie and macro totals for a user."""
+
+    # Recipes
+    @abstractmethod
+    def get_recipes(self, mobile):
+        """Return a user's saved recipes as dicts (see recipes.py)."""
+
+    @abstractmethod
+    def save_recipes(self, recipes) -> bool:
+        """Create or update recipes, matched by mobile number and name."""
+
+    @abstractmethod
+    def delete_recipe(self, mobile, name) -> bool:
+        """Delete a user's recipe."""
+
+
+class SheetsBackend(StorageBackend):
+    """Google Sheets storage, implemented by sheets_db."""
+
+    def get_all_foods(self):
+        return sheets_db.get_all_foods()
+
+    def get_food_catalog_version(self):
+        return sheets_db.get_food_catalog_version()
+
+    def add_food(self, food_data):
+        return sheets_db.add_food(food_data)
+
+    def delete_food(self, food_names) -> bool:
+        return sheets_db.delete_food(food_names)
+
+    def load_user_info(self):
+        return sheets_db.load_user_info()
+
+    def save_user_info(self, user_data):
+        return sheets_db.save_user_info(user_data)
+
+    def save_meal_log(self, meal_data) -> bool:
+        return sheets_db.save_meal_log(meal_data)
+
+    def save_meal_logs(self, meals) -> bool:
+        return sheets_db.save_meal_logs(meals)
+
+    def get_daily_logs(self, mobile, date=None):
+        return sheets_db.get_daily_logs(mobile, date)
+
+    def get_daily_logs_frame(self, mobile, date=None):
+        return sheets_db.get_daily_logs_frame(mobile, date)
+
+    def delete_logs_by_date_range(self, mobile, start_date, end_date) -> bool:
+        return sheets_db.delete_logs_by_date_range(mobile, start_date,
+                                                   end_date)
+
+    def get_daily_summaries(self, mobile):
+        return sheets_db.get_daily_summaries(mobile)
+
+    def get_recipes(self, mobile):
+        return sheets_db.get_recipes(mobile)
+
+    def save_recipes(self, recipes) -> bool:
+        return sheets_db.save_recipes(recipes)
+
+    def delete_recipe(self, mobile, name) -> bool:
+        return sheets_db.delete_recipe(mobile, name)
+
+
+def _create_backend(name):
+    if name == 'sheets':
+        return SheetsBackend()
+    if name == 'sqlite':
+        # Imported lazily so the database is only created when selected
+        from sql_db import SQLBackend
+        return SQLBackend()
+    raise ValueError(f"Unknown storage backend '{name}'")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """Return the process-wide backend chosen by STORAGE_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.getenv('STORAGE_BACKEND', DEFAULT_BACKEND)
+            _backend = _create_backend(name.strip().lower())
+        return _backend
+
+
+def get_all_foods():
+    return get_backend().get_all_foods()
+
+
+def get_food_catalog_version():
+    """Return the catalog version, prefixed with the backend in use."""
+    backend = get_backend()
+    version = backend.get_food_catalog_version()
+    if version is None:
+        return None
+    return f"{type(backend).__name__}:{version}"
+
+
+def add_food(food_data):
+    result = get_backend().add_food(food_data)
+    invalidate_region(FOOD_CATALOG)
+    return result
+
+
+def delete_food(food_names) -> bool:
+    result = get_backend().delete_food(food_names)
+    invalidate_region(FOOD_CATALOG)
+    return result
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def _load_user_info(mobile, version):
+    return get_backend().load_user_info()
+
+
+def load_user_info():
+    mobile = st.session_state.get('mobile', None)
+    if not mobile:
+        return None
+    return _load_user_info(str(mobile).strip(),
+                           region_version(USER_PROFILE, mobile))
+
+
+def save_user_info(user_data) -> bool:
+    result = get_backend().save_user_info(user_data)
+    mobile = user_data.get('mobile') or st.session_state.get('mobile')
+    # Unchanged saves keep the cached profile
+    if result and result != UNCHANGED and mobile:
+        invalidate_region(USER_PROFILE, mobile)
+    return bool(result)
+
+
+class UserLogContext:
+    """A user's logs for today, read once and shared within a rerun.
+
+    Today's rows serve the Home and Daily Log tabs' per-day views, and
+    the daily summaries come from the backend's rollup, fetched once.
+    Meals saved in the session are added to both (write-through), so
+    the partial reruns that follow a save need no read at all.
+    """
+
+    def __init__(self, mobile, date, frame, version):
+        self.mobile = mobile
+        self.date = date
+        self.frame = frame
+        self.version = version
+        self._summaries = None
+
+    def logs(self, date=None):
+        if date == self.date:
+            return self.frame.copy()
+        # Other days are not part of the context
+        return _get_daily_logs_frame(self.mobile, date, self.version)
+
+    def summaries(self):
+        if self._summaries is None:
+            # Read at the current version, so it includes every added meal
+            self._summaries = {
+                row['date']: dict(row)
+                for row in _get_daily_summaries(self.mobile, self.version)
+            }
+        return [dict(row) for row in self._summaries.values()]
+
+    def add(self, records, version):
+        """Add saved log records; version is the region's new version."""
+        added = logs_frame(records)
+        if self._summaries is not None:
+            for totals in summarize_logs(added).to_dict('records'):
+                row = self._summaries.setdefault(
+                    totals['date'], {
+                        'date': totals['date'],
+                        **{field: 0 for field in SUMMARY_FIELDS}
+                    })
+                for field in SUMMARY_FIELDS:
+                    row[field] += totals[field]
+
+        added = added[added['Date'] == self.date]
+        if not self.frame.empty:
+            added = pd.concat([self.frame, added], ignore_index=True)
+            added = added.sort_values('Timestamp',
+                                      kind='stable').reset_index(drop=True)
+        self.frame = added
+        self.version = version
+
+
+def _today():
+    """Return today's date in IST, formatted as in the logs."""
+    return datetime.now(pytz.timezone(IST)).strftime('%d-%m-%Y')
+
+
+# Session state key of the current rerun's UserLogContext
+LOG_CONTEXT_KEY = 'log_context'
+
+
+def _in_session():
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def reset_log_context():
+    """Drop the session's log context so this rerun reads fresh data.
+
+    Call it at the top of the page; fragment reruns keep the context of
+    the last full rerun, plus any meals saved since.
+    """
+    if _in_session():
+        st.session_state.pop(LOG_CONTEXT_KEY, None)
+
+
+def _log_context(mobile):
+    """Return the session's log context for mobile, reading it if needed."""
+    mobile = str(mobile).strip()
+    version = region_version(USER_LOGS, mobile)
+    context = st.session_state.get(LOG_CONTEXT_KEY)
+    # Logs changed outside this session's write-through (another session
+    # or a delete) bump the region past the context's version
+    if context is None or context.mobile != mobile or \
+            context.version != version or context.date != _today():
+        today = _today()
+        context = UserLogContext(mobile, today,
+                                 _get_daily_logs_frame(mobile, today, version),
+                                 version)
+        st.session_state[LOG_CONTEXT_KEY] = context
+    return context
+
+
+def save_meal_log(meal_data) -> bool:
+    return save_meal_logs([meal_data])
+
+
+def save_meal_logs(meals) -> bool:
+    """Log several food entries with one backend write."""
+    # Stamp the entries here so the log context gets the saved timestamps;
+    # distinct timestamps keep queued rows apart
+    now = datetime.now(pytz.timezone(IST))
+    meals = [{
+        'timestamp': now + timedelta(microseconds=offset),
+        **meal_data
+    } for offset, meal_data in enumerate(meals)]
+    if not meals:
+        return True
+    mobiles = {str(meal_data['mobile']).strip() for meal_data in meals}
+    versions = {mobile: region_version(USER_LOGS, mobile) for mobile in mobiles}
+    result = get_backend().save_meal_logs(meals)
+    for mobile in mobiles:
+        invalidate_region(USER_LOGS, mobile)
+
+    context = st.session_state.get(LOG_CONTEXT_KEY) if _in_session() \
+        else None
+    if result and context is not None and context.mobile in versions and \
+            context.version == versions[context.mobile]:
+        context.add([
+            dict(zip(LOG_HEADERS, log_row(meal_data, meal_data['timestamp'])))
+            for meal_data in meals
+            if str(meal_data['mobile']).strip() == context.mobile
+        ], region_version(USER_LOGS, context.mobile))
+    return result
+
+
+def get_daily_logs(mobile, date=None):
+    return get_backend().get_daily_logs(mobile, date)
+
+
+@st.cache_data(ttl=60, max_entries=1000, show_spinner=False)
+def _get_daily_logs_frame(mobile, date, version):
+    return get_backend().get_daily_logs_frame(mobile, date)
+
+
+def get_daily_logs_frame(mobile, date=None):
+    if _in_session():
+        return _log_context(mobile).logs(date)
+    return _get_daily_logs_frame(str(mobile).strip(), date,
+                                 region_version(USER_LOGS, mobile))
+
+
+def delete_logs_by_date_range(mobile, start_date, end_date) -> bool:
+    result = get_backend().delete_logs_by_date_range(
+        mobile, start_date, end_date)
+    invalidate_region(USER_LOGS, mobile)
+    return result
+
+
+@st.cache_data(ttl=60, max_entries=1000, show_spinner=False)
+def _get_daily_summaries(mobile, version):
+    return get_backend().get_daily_summaries(mobile)
+
+
+def get_daily_summaries(mobile):
+    if _in_session():
+        return _log_context(mobile).summaries()
+    return _get_daily_summaries(str(mobile).strip(),
+                                region_version(USER_LOGS, mobile))
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def _get_recipes(mobile, version):
+    return get_backend().get_recipes(mobile)
+
+
+def get_recipes(mobile):
+    return _get_recipes(str(mobile).strip(),
+                        region_version(USER_RECIPES, mobile))
+
+
+def save_recipes(recipes) -> bool:
+    result = get_backend().save_recipes(recipes)
+    for mobile in {str(recipe['mobile']).strip() for recipe in recipes}:
+        invalidate_region(USER_RECIPES, mobile)
+    return result
+
+
+def delete_recipe(mobile, name) -> bool:
+    result = get_backend().delete_recipe(mobile, name)
+    invalidate_region(USER_RECIPES, mobile)
+    return result
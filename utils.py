@@ -1,7 +1,30 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
-from sheets_db import get_all_foods, add_food
+from storage import get_all_foods, add_food, get_food_catalog_version
+from cache_regions import FOOD_CATALOG, region_version
+from food_snapshot import load_food_snapshot, save_food_snapshot
+from food_index import FoodNameIndex
+from food_search import FoodSearchIndex
 import streamlit as st
 
+logger = logging.getLogger(__name__)
+
+# Re-check the catalog version in the background this often (seconds)
+CATALOG_REFRESH_INTERVAL = float(
+    os.getenv('FOOD_CATALOG_REFRESH_INTERVAL', '240'))
+# Download the catalog again after this long even if the version has not
+# changed, so hand edits to the food sheet show up (seconds)
+CATALOG_MAX_AGE = float(os.getenv('FOOD_CATALOG_MAX_AGE', '300'))
+
+# Normalized name -> position in the cached food DataFrame
+_food_names = FoodNameIndex()
+# Trigram search over the same catalog version
+_food_search = FoodSearchIndex()
+
 
 def calculate_calories(weight_kg: float, mode: str = 'maintenance') -> float:
     """Calculate calories based on weight and selected mode."""
@@ -36,71 +59,344 @@ def calculate_calories_from_macros(protein: float, fat: float,
     return (protein * 4) + (fat * 9) + (carbs * 4)
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_food_database():
-    """Load the food database from Google Sheets."""
-    try:
-        df = get_all_foods()
-        if df.empty:
-            return pd.DataFrame(columns=[
-                'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight',
-                'Basis', 'Category', 'Fibre', 'Avg Weight', 'Source'
-            ])
-
-        # Map column names to standardized format
-        column_mapping = {
-            'Food Name': ['Food Name', 'food name', 'name', 'Food'],
-            'Calories': ['Calories', 'calories', 'kcal'],
-            'Protein': ['Protein', 'protein', 'proteins'],
-            'Fat': ['Fat', 'fat', 'fats'],
-            'Carbs': ['Carbs', 'carbs', 'carbohydrates'],
-            'Weight': ['Weight', 'weight'],
-            'Basis': ['Basis', 'basis', 'unit'],
-            'Category': ['Category', 'Veg/Non-Veg', 'veg_nonveg'],
-            'Fibre': ['Fibre', 'Fiber', 'fibre', 'fiber'],
-            'Avg Weight': ['Avg Weight', 'avg_weight', 'average weight'],
-            'Source': ['Source', 'source']
+# Standard catalog columns
+FOOD_COLUMNS = [
+    'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight', 'Basis',
+    'Category', 'Fibre', 'Avg Weight', 'Source'
+]
+
+# Map column names to standardized format
+COLUMN_MAPPING = {
+    'Food Name': ['Food Name', 'food name', 'name', 'Food'],
+    'Calories': ['Calories', 'calories', 'kcal'],
+    'Protein': ['Protein', 'protein', 'proteins'],
+    'Fat': ['Fat', 'fat', 'fats'],
+    'Carbs': ['Carbs', 'carbs', 'carbohydrates'],
+    'Weight': ['Weight', 'weight'],
+    'Basis': ['Basis', 'basis', 'unit'],
+    'Category': ['Category', 'Veg/Non-Veg', 'veg_nonveg'],
+    'Fibre': ['Fibre', 'Fiber', 'fibre', 'fiber'],
+    'Avg Weight': ['Avg Weight', 'avg_weight', 'average weight'],
+    'Source': ['Source', 'source']
+}
+
+# Precompiled lower-cased alias -> standard name lookup
+_COLUMN_ALIASES = {
+    alias.lower(): std_name
+    for std_name, aliases in COLUMN_MAPPING.items() for alias in aliases
+}
+
+REQUIRED_COLUMNS = [
+    'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight', 'Basis',
+    'Category'
+]
+
+# Compact dtypes of the in-memory catalog
+NUTRIENT_COLUMNS = ['Calories', 'Protein', 'Fat', 'Carbs', 'Fibre']
+MEASURE_COLUMNS = ['Weight', 'Avg Weight']
+CATEGORICAL_COLUMNS = ['Basis', 'Category']
+
+
+def normalize_food_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename known column aliases to the standard names in one pass."""
+    rename_map = {}
+    for col in df.columns:
+        std_name = _COLUMN_ALIASES.get(str(col).lower())
+        if std_name and std_name not in rename_map.values():
+            rename_map[col] = std_name
+    return df.rename(columns=rename_map)
+
+
+def compact_food_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Give the catalog compact dtypes and index it by food name.
+
+    Nutrients become float32 (missing as 0), Weight/Avg Weight become
+    float32 (missing as NaN), Basis/Category become categoricals, and the
+    index holds the food names for label lookups.
+    """
+    df = df.copy()
+    for col in NUTRIENT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col],
+                                    errors='coerce').fillna(0).astype('float32')
+    for col in MEASURE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().astype('category')
+    df['Food Name'] = df['Food Name'].astype(str)
+    df.index = pd.Index(df['Food Name'].to_numpy())
+    return df
+
+
+# Nutrients scaled by the logged portion, and the log fields they go to
+LOGGED_NUTRIENTS = {
+    'Calories': 'calories',
+    'Protein': 'protein',
+    'Fat': 'fat',
+    'Carbs': 'carbs'
+}
+
+# Decimals kept in logged nutrients; also hides the float32 noise of the
+# compact catalog (5.4 is stored as 5.400000095...)
+LOGGED_DECIMALS = 2
+
+
+class FoodLookup:
+    """Constant-time food lookups over one catalog frame.
+
+    Maps each food name to its row and precomputes the nutrients per
+    unit (gram, ml or piece, from Basis) by dividing them by Weight, the
+    quantity they are given for, so scaling a portion is a single row
+    times scalar operation. Without a Weight, pieces ('p') are per 1 and
+    everything else per 100.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._size = len(df)
+        names = df['Food Name'].tolist() if 'Food Name' in df.columns else []
+        self._rows = {}
+        for row, name in enumerate(names):
+            self._rows.setdefault(name, row)
+        self._basis = self._strings(df, 'Basis', 'gm')
+        self._category = self._strings(df, 'Category', 'N/A')
+
+        base = np.where(np.array(self._basis, dtype=object) == 'p', 1.0,
+                        100.0)
+        weight = self._numbers(df, 'Weight', np.nan)
+        weight = np.where(weight > 0, weight, base)  # NaN > 0 is False
+        nutrients = np.column_stack(
+            [self._numbers(df, col, 0.0) for col in LOGGED_NUTRIENTS])
+        self.per_unit = nutrients / weight[:, None]
+
+    def _strings(self, df, col, default):
+        if col not in df.columns:
+            return [default] * self._size
+        return df[col].astype(str).tolist()
+
+    def _numbers(self, df, col, default):
+        if col not in df.columns:
+            return np.full(self._size, default)
+        return pd.to_numeric(df[col], errors='coerce').to_numpy(
+            dtype='float64', na_value=default)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, name):
+        """Return the row of name in the catalog frame, or None."""
+        return self._rows.get(name)
+
+    def basis(self, name) -> str:
+        return self._basis[self._rows[name]]
+
+    def category(self, name) -> str:
+        return self._category[self._rows[name]]
+
+    def scaled(self, name, portion) -> dict:
+        """Return the nutrients of portion units of name as rounded floats."""
+        values = self.per_unit[self._rows[name]] * float(portion)
+        return {
+            field: round(value, LOGGED_DECIMALS)
+            for field, value in zip(LOGGED_NUTRIENTS.values(),
+                                    values.tolist())
         }
 
-        # Map columns to standardized names
-        for std_name, possible_names in column_mapping.items():
-            for col in df.columns:
-                if col.lower() in [name.lower() for name in possible_names]:
-                    df = df.rename(columns={col: std_name})
-                    break
 
-        # Ensure all required columns exist
-        required_columns = [
-            'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight',
-            'Basis', 'Category'
-        ]
-        missing_columns = set(required_columns) - set(df.columns)
+def download_food_catalog() -> pd.DataFrame:
+    """Download the catalog from storage and normalize it."""
+    df = get_all_foods()
+    if df.empty:
+        return pd.DataFrame(columns=FOOD_COLUMNS)
+
+    df = normalize_food_columns(df)
+
+    # Ensure all required columns exist
+    missing_columns = set(REQUIRED_COLUMNS) - set(df.columns)
+
+    if missing_columns:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+    return compact_food_frame(df)
+
+
+class FoodCatalog:
+    """Process-wide food catalog served stale-while-revalidate.
+
+    Readers always get the current in-memory frame (treat it as
+    read-only). A background thread re-checks the catalog version every
+    refresh_interval seconds, or as soon as the food catalog cache region
+    is invalidated, and only downloads when the version has changed or
+    the catalog is more than max_age seconds old (edits made directly in
+    the sheet do not change the version). The new frame is swapped in
+    atomically; a failed reload keeps serving the previous one. Only the
+    very first load of a process blocks, and it is served from the
+    on-disk snapshot when that is current.
+    """
+
+    def __init__(self,
+                 refresh_interval=CATALOG_REFRESH_INTERVAL,
+                 max_age=CATALOG_MAX_AGE):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._refresh_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._frame = None
+        self._lookup = None
+        self._version = None
+        self._region = None
+        # When the current frame was downloaded (epoch seconds)
+        self._fetched_at = 0
+
+    def get(self) -> pd.DataFrame:
+        frame = self._frame
+        if frame is None:
+            with self._refresh_lock:
+                if self._frame is None:
+                    self._reload()
+            frame = self._frame
+        self._start()
+        if self._region != region_version(FOOD_CATALOG):
+            self._wakeup.set()
+        return frame
+
+    def lookup(self, frame=None) -> FoodLookup:
+        """Return the FoodLookup of frame (by default the current one).
+
+        Built once per frame, so a frame and its lookup always match.
+        """
+        if frame is None:
+            frame = self.get()
+        cached = self._lookup
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+        lookup = FoodLookup(frame)
+        self._lookup = (frame, lookup)
+        return lookup
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._swap_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name='food-catalog', daemon=True)
+                    self._thread.start()
+
+    def _expires_in(self):
+        return self._fetched_at + self.max_age - time.time()
 
-        if missing_columns:
-            return pd.DataFrame(columns=required_columns)
+    def _swap(self, df, version, region, fetched_at):
+        names = df['Food Name'] if 'Food Name' in df.columns else []
+        _food_names.rebuild(names)
+        _food_search.set_names(names)
+        with self._swap_lock:
+            self._frame = df
+            self._version = version
+            self._region = region
+            self._fetched_at = fetched_at
 
-        # Convert numeric columns
-        numeric_columns = ['Calories', 'Protein', 'Fat', 'Carbs', 'Fibre']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    def _reload(self):
+        """Load a new catalog version (or a too old one again)."""
+        region = region_version(FOOD_CATALOG)
+        version = get_food_catalog_version()
+        if self._frame is not None and (version is None or
+                                        (version == self._version
+                                         and self._expires_in() > 0)):
+            # Unchanged, or the check failed: keep serving what we have
+            self._region = region
+            return
 
-        return df
+        df = load_food_snapshot(version, self.max_age)
+        if df is not None:
+            fetched_at = df.attrs.get('saved_at', time.time())
+        else:
+            fetched_at = time.time()
+            df = download_food_catalog()
+            if df.empty and self._frame is not None:
+                return
+            if not df.empty:
+                save_food_snapshot(df, version, fetched_at)
+            if version == self._version and df.equals(self._frame):
+                # Expired but nothing was edited: keep the indexes
+                with self._swap_lock:
+                    self._region = region
+                    self._fetched_at = fetched_at
+                return
+        self._swap(df, version, region, fetched_at)
 
+    def _run(self):
+        while True:
+            expires_in = self._expires_in()
+            self._wakeup.wait(
+                min(self.refresh_interval, expires_in)
+                if expires_in > 0 else self.refresh_interval)
+            self._wakeup.clear()
+            try:
+                with self._refresh_lock:
+                    self._reload()
+            except Exception as e:
+                logger.warning('Food catalog refresh failed: %s', e)
+
+    def add_food(self, food_data: dict):
+        """Show a newly saved food right away, until the next reload."""
+        row = normalize_food_columns(pd.DataFrame([food_data]))
+        with self._swap_lock:
+            if self._frame is None:
+                return
+            if self._frame.empty:
+                frame = row.reindex(columns=FOOD_COLUMNS)
+            else:
+                frame = pd.concat(
+                    [self._frame,
+                     row.reindex(columns=self._frame.columns)],
+                    ignore_index=True)
+            self._frame = compact_food_frame(frame)
+        _food_search.add(food_data['Food Name'])
+
+
+_catalog = FoodCatalog()
+
+
+def load_food_database():
+    """Load the food database as a compact, name-indexed DataFrame.
+
+    Served from the in-process catalog, which refreshes itself in the
+    background (see FoodCatalog) and is backed by the on-disk snapshot.
+    """
+    try:
+        return _catalog.get()
     except Exception as e:
         st.error(f"Error loading food database: {str(e)}")
-        return pd.DataFrame(columns=[
-            'Food Name', 'Calories', 'Protein', 'Fat', 'Carbs', 'Weight',
-            'Basis', 'Category', 'Fibre', 'Avg Weight', 'Source'
-        ])
+        return pd.DataFrame(columns=FOOD_COLUMNS)
+
+
+def get_food_lookup(food_db: pd.DataFrame = None) -> FoodLookup:
+    """Return name lookups and per-unit nutrients for a loaded catalog.
+
+    Pass the frame returned by load_food_database() to get the lookup
+    matching it exactly.
+    """
+    return _catalog.lookup(food_db)
 
 
 def food_exists_in_database(food_name: str) -> bool:
     """Check if a food item already exists in the database."""
-    df = load_food_database()
-    if 'Food Name' not in df.columns:
-        return False
-    return food_name.lower() in df['Food Name'].str.lower().values
+    if not _food_names.loaded:
+        load_food_database()
+    return _food_names.contains(food_name)
+
+
+def search_foods(query: str, limit: int = 10) -> list:
+    """Return up to limit food names matching query, best match first."""
+    if not _food_names.loaded:
+        load_food_database()
+    return _food_search.search(query, limit)
 
 
 def save_food_to_database(food_data: dict):
@@ -120,8 +416,10 @@ def save_food_to_database(food_data: dict):
             )
             return False
 
+        # Also invalidates the food catalog region, waking the refresher
         add_food(food_data)
-        st.cache_data.clear()  # Clear cache to reload updated data
+        _food_names.add(food_data['Food Name'])
+        _catalog.add_food(food_data)
         return True
     except Exception as e:
         st.error(f"Error saving food to database: {str(e)}")
@@ -0,0 +1,164 @@
+"""Write-behind queue for meal log rows.
+
+Rows are stored in a local SQLite file first, so logging a meal returns
+immediately and survives a restart. A background thread appends them to
+the sheet in batches with append_rows, either every FLUSH_INTERVAL
+seconds or as soon as BATCH_SIZE rows are waiting, and backs off when
+the Sheets API reports an error such as a quota limit.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PATH = os.getenv('MEAL_LOG_QUEUE_PATH', 'data/meal_log_queue.db')
+BATCH_SIZE = int(os.getenv('MEAL_LOG_BATCH_SIZE', '50'))
+FLUSH_INTERVAL = float(os.getenv('MEAL_LOG_FLUSH_INTERVAL', '5'))
+MAX_BACKOFF = 300.0
+
+
+class MealLogWriter:
+    """Durable queue that flushes meal log rows to a worksheet."""
+
+    def __init__(self,
+                 sheet_getter,
+                 path=QUEUE_PATH,
+                 batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self._sheet_getter = sheet_getter
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._failures = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path,
+                                     check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS pending ('
+                           'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                           'mobile TEXT NOT NULL, '
+                           'log_date TEXT NOT NULL, '
+                           'row TEXT NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_pending_mobile '
+                           'ON pending (mobile, log_date)')
+
+    def start(self):
+        """Start the background flusher if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run,
+                                                name='meal-log-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, flush=True):
+        """Stop the flusher, optionally flushing what is queued first."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        if flush:
+            while self.flush():
+                pass
+
+    def enqueue(self, mobile, log_date, row):
+        """Queue a row; log_date is its 'YYYY-MM-DD' date."""
+        self.enqueue_many([(mobile, log_date, row)])
+
+    def enqueue_many(self, entries):
+        """Queue (mobile, log_date, row) entries in one transaction."""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT INTO pending (mobile, log_date, row) '
+                    'VALUES (?, ?, ?)',
+                    [(str(mobile).strip(), log_date, json.dumps(row))
+                     for mobile, log_date, row in entries])
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            count = self._conn.execute(
+                'SELECT COUNT(*) FROM pending').fetchone()[0]
+        self.start()
+        if count >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self, mobile=None):
+        """Return queued rows, oldest first, optionally for one user."""
+        with self._lock:
+            if mobile is None:
+                cursor = self._conn.execute(
+                    'SELECT row FROM pending ORDER BY id')
+            else:
+                cursor = self._conn.execute(
+                    'SELECT row FROM pending WHERE mobile = ? ORDER BY id',
+                    (str(mobile).strip(), ))
+            return [json.loads(row) for (row, ) in cursor.fetchall()]
+
+    def discard(self, mobile, start_date, end_date):
+        """Drop queued rows for a user between two 'YYYY-MM-DD' dates.
+
+        Waits for an in-flight flush, so afterwards every surviving row
+        for the range is either in the sheet or gone.
+        """
+        with self._flush_lock, self._lock:
+            self._conn.execute(
+                'DELETE FROM pending WHERE mobile = ? '
+                'AND log_date BETWEEN ? AND ?',
+                (str(mobile).strip(), start_date, end_date))
+
+    def flush(self):
+        """Append one batch of queued rows to the sheet.
+
+        Returns the number of rows written. Rows stay queued if the
+        append fails, and the error is raised to the caller.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self._conn.execute(
+                    'SELECT id, row FROM pending ORDER BY id LIMIT ?',
+                    (self.batch_size, )).fetchall()
+            if not batch:
+                return 0
+
+            rows = [json.loads(row) for _, row in batch]
+            self._sheet_getter().append_rows(rows)
+
+            with self._lock:
+                self._conn.execute(
+                    'DELETE FROM pending WHERE id <= ?', (batch[-1][0], ))
+            return len(rows)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._failures:
+                delay = min(MAX_BACKOFF,
+                            self.flush_interval * 2**self._failures)
+            else:
+                delay = self.flush_interval
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                while self.flush() == self.batch_size:
+                    pass
+                self._failures = 0
+            except Exception as e:
+                self._failures += 1
+                logger.warning('Meal log flush failed (attempt %d): %s',
+                               self._failures, e)